@@ -1,10 +1,15 @@
 from arcgis.geometry import Geometry, Point, Polyline, find_transformation, project, SpatialReference
 from shapely import ops
 import importlib
+import numpy as np
 
 # check what packages are available
 HASARCPY = True if importlib.util.find_spec("arcpy") else False
 HASSHAPELY = True if importlib.util.find_spec("shapely") else False
+HASNUMBA = True if importlib.util.find_spec("numba") else False
+
+# bound once so hot snapping loops do not repeat the global lookup for the constructor
+_make_point = Point
 
 
 @classmethod
@@ -27,11 +32,14 @@ def from_shapely(cls, shapely_geometry, spatial_reference=None):
         raise Exception('Shapely is required to execute from_shapely.')
 
 
-def snap_to_line(self, polyline_geometry):
+def snap_to_line(self, polyline_geometry, approximate=False):
     """
     Returns a new point snapped to the closest location along the input line geometry.
     :param polyline_geometry: Required arcgis.geometry.Polyline
         ArcGIS Polyline geometry the Point will be snapped to.
+    :param approximate: Optional Boolean - Default False
+        Locate the nearest vertex using a KD-tree built once for the line, and only snap to the segments on either
+        side of this vertex. Much faster for long lines, but may miss a closer location along a long segment.
     :return: arcgis.geometry.Point
         ArcGIS Point geometry coincident with the nearest location along the input
         ArcGIS Polyline object
@@ -40,32 +48,229 @@ def snap_to_line(self, polyline_geometry):
         raise Exception('Snap to line can only be performed on a Point geometry object.')
     if polyline_geometry.type.lower() != 'polyline':
         raise Exception('Snapping target must be a single ArcGIS Polyline geometry object.')
-    if self.spatial_reference is None:
+
+    # pull the spatial references once, since each access is a lookup through the geometry dictionary
+    point_sr = self.spatial_reference
+    line_sr = polyline_geometry.spatial_reference
+
+    if point_sr is None:
         raise Warning('The spatial reference for the point to be snapped to a line is not defined.')
-    if polyline_geometry.spatial_reference is None:
+    if line_sr is None:
         raise Warning('The spatial reference of the line being snapped to is not defined.')
-    if (self.spatial_reference != polyline_geometry.spatial_reference and
-            self.spatial_reference.wkid != polyline_geometry.spatial_reference.wkid and
-            self.spatial_reference.latestWkid != polyline_geometry.spatial_reference.wkid and
-            self.spatial_reference.wkid != polyline_geometry.spatial_reference.latestWkid and
-            self.spatial_reference.latestWkid != polyline_geometry.spatial_reference.latestWkid):
+    if (point_sr != line_sr and
+            point_sr.wkid != line_sr.wkid and
+            point_sr.latestWkid != line_sr.wkid and
+            point_sr.wkid != line_sr.latestWkid and
+            point_sr.latestWkid != line_sr.latestWkid):
         raise Exception('The spatial reference for the point and the line are not the same.')
 
+    if approximate:
+        snap_x, snap_y, _ = _snap_points_near_vertices(np.array([[self.x, self.y]]), polyline_geometry)[0]
+        return _make_point({'x': snap_x, 'y': snap_y, 'spatialReference': point_sr})
+
     if HASARCPY:
         polyline_geometry = polyline_geometry.as_arcpy
         return Point(self.as_arcpy.snapToLine(in_point=polyline_geometry))
 
     elif HASSHAPELY:
         polyline_geometry = polyline_geometry.as_shapely
-        point_geometry = self.as_shapely
-        snap_point = polyline_geometry.interpolate(polyline_geometry.project(point_geometry))
-        snap_point = Point({'x': snap_point.x, 'y': snap_point.y, 'spatialReference': self.spatial_reference})
-        return snap_point
+        snap_point = polyline_geometry.interpolate(polyline_geometry.project(self.as_shapely))
+        return _make_point({'x': snap_point.x, 'y': snap_point.y, 'spatialReference': point_sr})
 
     else:
         raise Exception('Either arcpy or Shapely is required to perform snap_to_line')
 
 
+def _snap_points_to_segments_numpy(pts_xy, seg_start, seg_end):
+    """
+    Snap each point to the closest location along a collection of line segments using NumPy.
+    :param pts_xy: (N, 2) array of point coordinates.
+    :param seg_start: (M, 2) array of segment start coordinates.
+    :param seg_end: (M, 2) array of segment end coordinates.
+    :return: (N, 3) array of [snap_x, snap_y, segment_index] for each point.
+    """
+    seg_d = seg_end - seg_start
+    seg_len_sq = np.einsum('ij,ij->i', seg_d, seg_d)
+
+    # zero length segments snap to their start vertex
+    seg_len_sq[seg_len_sq == 0] = np.inf
+
+    out = np.empty((pts_xy.shape[0], 3), dtype=np.float64)
+
+    # loop the points, but vectorize across all the segments for each point
+    for i in range(pts_xy.shape[0]):
+        t = np.einsum('ij,ij->i', pts_xy[i] - seg_start, seg_d) / seg_len_sq
+        t = np.clip(t, 0.0, 1.0)
+        proj = seg_start + seg_d * t[:, None]
+        dist_sq = np.einsum('ij,ij->i', proj - pts_xy[i], proj - pts_xy[i])
+        seg_idx = np.argmin(dist_sq)
+        out[i, 0] = proj[seg_idx, 0]
+        out[i, 1] = proj[seg_idx, 1]
+        out[i, 2] = seg_idx
+
+    return out
+
+
+if HASNUMBA:
+    import numba
+
+    @numba.njit(parallel=True, cache=True, fastmath=True)
+    def _snap_points_to_segments_numba(pts_xy, seg_start, seg_end):
+        """
+        Compiled equivalent of _snap_points_to_segments_numpy, processing the points in parallel.
+        """
+        n_pts = pts_xy.shape[0]
+        n_seg = seg_start.shape[0]
+        out = np.empty((n_pts, 3), dtype=np.float64)
+
+        for i in numba.prange(n_pts):
+            px = pts_xy[i, 0]
+            py = pts_xy[i, 1]
+            best_dist = np.inf
+            best_x = px
+            best_y = py
+            best_idx = 0
+
+            for j in range(n_seg):
+                ax = seg_start[j, 0]
+                ay = seg_start[j, 1]
+                dx = seg_end[j, 0] - ax
+                dy = seg_end[j, 1] - ay
+                len_sq = dx * dx + dy * dy
+
+                t = 0.0
+                if len_sq > 0.0:
+                    t = ((px - ax) * dx + (py - ay) * dy) / len_sq
+                    if t < 0.0:
+                        t = 0.0
+                    elif t > 1.0:
+                        t = 1.0
+
+                sx = ax + t * dx
+                sy = ay + t * dy
+                dist = (sx - px) * (sx - px) + (sy - py) * (sy - py)
+
+                if dist < best_dist:
+                    best_dist = dist
+                    best_x = sx
+                    best_y = sy
+                    best_idx = j
+
+            out[i, 0] = best_x
+            out[i, 1] = best_y
+            out[i, 2] = best_idx
+
+        return out
+
+    _snap_points_to_segments = _snap_points_to_segments_numba
+
+else:
+    _snap_points_to_segments = _snap_points_to_segments_numpy
+
+
+def _polyline_segments(polyline_geometry):
+    """
+    Get the start and end coordinates for every segment in a polyline, without creating segments spanning paths.
+    :param polyline_geometry: Required arcgis.geometry.Polyline
+    :return: Tuple of two (M, 2) arrays, the segment start and end coordinates.
+    """
+    paths = [np.asarray(path, dtype=np.float64)[:, :2] for path in polyline_geometry.paths if len(path) > 1]
+    if not len(paths):
+        raise Exception('Snapping target must have at least one path with two or more vertices.')
+    seg_start = np.concatenate([path[:-1] for path in paths])
+    seg_end = np.concatenate([path[1:] for path in paths])
+    return seg_start, seg_end
+
+
+def _get_snap_index(polyline_geometry):
+    """
+    Get the segments, a KD-tree of the vertices, and the segments touching each vertex for a polyline. This is built
+        once on first use and kept on the geometry object, outside the geometry dictionary so it is never serialized.
+    :param polyline_geometry: Required arcgis.geometry.Polyline
+    :return: Tuple of segment start array, segment end array, cKDTree and (V, 2) array of incident segment indices,
+        with -1 where a vertex is at the end of a path.
+    """
+    paths = polyline_geometry.paths
+    snap_index = polyline_geometry.__dict__.get('_snap_index')
+
+    # rebuild if the paths have been replaced since the index was created
+    if snap_index is None or snap_index[0] is not paths:
+        from scipy.spatial import cKDTree
+
+        vert_lst, vert_seg_lst = [], []
+        seg_offset = 0
+        for path in paths:
+            path = np.asarray(path, dtype=np.float64)[:, :2]
+            if len(path) < 2:
+                continue
+            vert_idx = np.arange(len(path))
+            vert_segs = np.column_stack([vert_idx - 1, vert_idx]) + seg_offset
+            vert_segs[0, 0] = -1
+            vert_segs[-1, 1] = -1
+            vert_lst.append(path)
+            vert_seg_lst.append(vert_segs)
+            seg_offset += len(path) - 1
+
+        seg_start, seg_end = _polyline_segments(polyline_geometry)
+        snap_index = (paths, seg_start, seg_end, cKDTree(np.concatenate(vert_lst)), np.concatenate(vert_seg_lst))
+        object.__setattr__(polyline_geometry, '_snap_index', snap_index)
+
+    return snap_index[1:]
+
+
+def _snap_points_near_vertices(pts_xy, polyline_geometry):
+    """
+    Snap points only to the segments touching the nearest vertex of the polyline, found using a KD-tree.
+    :param pts_xy: (N, 2) array of point coordinates.
+    :param polyline_geometry: Required arcgis.geometry.Polyline
+    :return: (N, 3) array of [snap_x, snap_y, segment_index] for each point.
+    """
+    seg_start, seg_end, kdtree, vert_segs = _get_snap_index(polyline_geometry)
+    _, vert_idx = kdtree.query(pts_xy)
+
+    # evaluate the segments on either side of the nearest vertex, with a path end reusing the other segment
+    cand = vert_segs[vert_idx]
+    cand = np.where(cand < 0, cand[:, ::-1], cand)
+
+    best = None
+    for col in range(2):
+        seg_idx = cand[:, col]
+        seg_d = seg_end[seg_idx] - seg_start[seg_idx]
+        len_sq = np.einsum('ij,ij->i', seg_d, seg_d)
+        len_sq[len_sq == 0] = np.inf
+        t = np.clip(np.einsum('ij,ij->i', pts_xy - seg_start[seg_idx], seg_d) / len_sq, 0.0, 1.0)
+        proj = seg_start[seg_idx] + seg_d * t[:, None]
+        dist_sq = np.einsum('ij,ij->i', proj - pts_xy, proj - pts_xy)
+        snap = np.column_stack([proj, seg_idx, dist_sq])
+        best = snap if best is None else np.where((dist_sq < best[:, 3])[:, None], snap, best)
+
+    return best[:, :3]
+
+
+def snap_points(self, pts_xy, approximate=False):
+    """
+    Snap a batch of coordinate pairs to the closest locations along the polyline in a single call. When Numba is
+        available, the work is compiled and spread across all available cores.
+    :param pts_xy: Required array-like
+        (N, 2) coordinate pairs in the same spatial reference as the polyline.
+    :param approximate: Optional Boolean - Default False
+        Only snap to the segments touching the nearest vertex, found using a KD-tree built once for the line.
+    :return: numpy.ndarray
+        (N, 3) array of [snap_x, snap_y, segment_index] for each input point.
+    """
+    if not isinstance(self, Polyline):
+        raise Exception('Snap points can only be performed on a Polyline geometry object.')
+
+    pts_xy = np.ascontiguousarray(pts_xy, dtype=np.float64).reshape(-1, 2)
+
+    if approximate:
+        return _snap_points_near_vertices(pts_xy, self)
+
+    seg_start, seg_end = _polyline_segments(self)
+
+    return _snap_points_to_segments(pts_xy, seg_start, seg_end)
+
+
 def split_at_point(self, point_geometry):
     """
     Returns two polyline geometry objects as a list split at the intersection of the line.
@@ -193,6 +398,7 @@ def match_spatial_reference(self, match_geometry):
 
 Geometry.from_shapely = from_shapely
 Geometry.snap_to_line = snap_to_line
+Geometry.snap_points = snap_points
 Geometry.split_at_point = split_at_point
 Geometry.trim_at_point = trim_at_point
 Geometry.project_as = project_as
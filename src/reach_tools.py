@@ -14,14 +14,28 @@ purpose:    Provide the utilities to process and work with whitewater reach data
     limitations under the License.
 """
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import datetime
+import time
+import functools
+import importlib
+import io
+import os
+import shelve
+import bisect
+import itertools
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future
+import threading
+import weakref
 import arcgis
 from arcgis.features import FeatureLayer, Feature, GeoAccessor, GeoSeriesAccessor
 from arcgis.geometry import Geometry, Point, Polyline, Polygon
 from arcgis.gis import GIS
 from arcgis.env import active_gis
 from scipy.interpolate import splprep, splev
-from copy import deepcopy
+from copy import copy, deepcopy
 from arcgis.gis import GIS, Item
 import pandas as pd
 import numpy as np
@@ -29,7 +43,6 @@ import re
 from uuid import uuid4
 import shapely.ops
 import shapely.geometry
-import inspect
 from html.parser import HTMLParser
 import json
 
@@ -44,6 +57,186 @@ except:
     import src.hydrology as hydrology  # until my PR gets accepted
 
 
+# shared session so connections to the EPA and AW services are kept alive and reused across calls, with retries and
+# backoff handled by the adapters instead of hand rolled loops
+_SESSION = requests.Session()
+_SESSION.headers.update({'Connection': 'keep-alive', 'Accept-Encoding': 'gzip, deflate'})
+_SESSION.mount('https://ofmpub.epa.gov', HTTPAdapter(
+    pool_connections=32, pool_maxsize=64,
+    max_retries=Retry(total=10, backoff_factor=0.3, status_forcelist=[500, 502, 503, 504], raise_on_status=False)
+))
+_SESSION.mount('http://ofmpub.epa.gov', _SESSION.get_adapter('https://ofmpub.epa.gov'))
+
+# AW responds with a 500 when a reach does not exist, so this is not retried
+_SESSION.mount('https://www.americanwhitewater.org', HTTPAdapter(
+    pool_connections=32, pool_maxsize=64,
+    max_retries=Retry(total=10, backoff_factor=0.3, status_forcelist=[502, 503, 504], raise_on_status=False)
+))
+
+# connect and read timeouts in seconds
+_TIMEOUT = (5, 30)
+
+# GIS connection sessions already given a larger connection pool
+_POOLED_GIS_SESSIONS = weakref.WeakSet()
+_POOLED_GIS_SESSIONS_LOCK = threading.Lock()
+
+
+def _pool_gis_session(gis):
+    """
+    Give the requests session behind a GIS connection a larger connection pool with retries, so all the feature
+    layers sharing the GIS reuse connections for their queries and edits. Only done once for each session.
+    :param gis: ArcGIS Python API GIS object instance.
+    :return:
+    """
+    session = getattr(getattr(gis, '_con', None), '_session', None)
+    if not isinstance(session, requests.Session):
+        return
+
+    with _POOLED_GIS_SESSIONS_LOCK:
+        if session in _POOLED_GIS_SESSIONS:
+            return
+        _POOLED_GIS_SESSIONS.add(session)
+
+        # leave any specialized adapter, such as for PKI or IWA authentication, alone
+        if type(session.get_adapter('https://')) is not HTTPAdapter:
+            return
+
+        # edits are posted, and not retried after being sent, so this only retries connecting and idempotent queries
+        adapter = HTTPAdapter(
+            pool_connections=16, pool_maxsize=32,
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504], raise_on_status=False)
+        )
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+
+# responses from the WATERS and AW services are cached, in memory and on disk if diskcache is installed
+CACHE_ENABLED = True
+HASDISKCACHE = True if importlib.util.find_spec("diskcache") else False
+_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'water-reach-tracer')
+_POINT_INDEXING_CACHE_EXPIRE = 7 * 24 * 60 * 60  # seconds
+_AW_CACHE_EXPIRE = 24 * 60 * 60  # seconds
+_QUERY_CACHE_SIZE = 512  # reach id queries kept for each feature layer
+_QUERY_CACHE_TTL = 60.0  # seconds
+_REACH_CACHE_SIZE = 512  # parsed reaches kept in memory by Reach.get_from_aw
+_REACH_CACHE_TTL = 60 * 60  # seconds, no longer than _AW_CACHE_EXPIRE
+
+# parsed reaches with the time each one expires, most recently used last, so getting the same reach again skips
+# downloading and parsing
+_REACH_CACHE = OrderedDict()
+_REACH_CACHE_LOCK = threading.Lock()
+
+
+@functools.lru_cache(maxsize=1)
+def _get_disk_cache():
+    """Get the on disk response cache, or None if diskcache is not available."""
+    if HASDISKCACHE:
+        import diskcache
+        return diskcache.Cache(_CACHE_DIR)
+    else:
+        return None
+
+
+# the WATERS trace responses only depend on the query parameters, so they are cached on disk if requests-cache is
+# installed - the point indexing responses are already cached above
+HASREQUESTSCACHE = True if importlib.util.find_spec("requests_cache") else False
+_WATERS_CACHE_EXPIRE = 30 * 24 * 60 * 60  # seconds
+
+
+def _get_waters_session():
+    """Get the session for WATERS trace requests, caching responses on disk if requests-cache is available."""
+    if not (HASREQUESTSCACHE and CACHE_ENABLED):
+        return _SESSION
+    return _get_cached_waters_session()
+
+
+def _waters_response_succeeded(response):
+    """
+    Check if WATERS reports success in the body of a response, since a failed trace still comes back as HTTP 200.
+    :param response: Response from a WATERS service.
+    :return: Boolean True if the response succeeded and has output.
+    """
+    try:
+        resp_json = _json_loads(response.content)
+    except ValueError:
+        return False
+    return (resp_json.get('status') or {}).get('status_code') == 0 and resp_json.get('output') is not None
+
+
+@functools.lru_cache(maxsize=1)
+def _get_cached_waters_session():
+    """helper creating the WATERS session caching responses on disk the first time it is needed"""
+    import requests_cache
+    os.makedirs(_CACHE_DIR, exist_ok=True)
+
+    # only keep successful traces, so a failure is requested again on the next attempt instead of read back from disk
+    session = requests_cache.CachedSession(os.path.join(_CACHE_DIR, 'waters'), backend='sqlite',
+                                           expire_after=_WATERS_CACHE_EXPIRE, filter_fn=_waters_response_succeeded)
+
+    # use the same pooled connections and retries as everything else
+    session.headers.update(_SESSION.headers)
+    for prefix in ('https://ofmpub.epa.gov', 'http://ofmpub.epa.gov'):
+        session.mount(prefix, _SESSION.get_adapter(prefix))
+
+    return session
+
+
+# orjson parses the large WATERS trace responses several times faster than the standard library, if available
+HASORJSON = True if importlib.util.find_spec("orjson") else False
+if HASORJSON:
+    import orjson
+
+
+# errors from parsing a garbled or truncated response, with either parser
+_JSON_DECODE_ERRORS = (json.JSONDecodeError, orjson.JSONDecodeError) if HASORJSON else (json.JSONDecodeError,)
+
+
+def _json_loads(content):
+    """Parse JSON from response bytes, using orjson if available."""
+    return orjson.loads(content) if HASORJSON else json.loads(content)
+
+
+# without orjson, streaming out only the part of the AW reach JSON used in parsing skips building the rest of the page
+HASIJSON = True if importlib.util.find_spec("ijson") else False
+if HASIJSON:
+    import ijson
+
+_AW_REACH_JSON_PATH = ('CContainerViewJSON_view', 'CRiverMainGadgetJSON_main')
+
+
+def _aw_json_loads(content):
+    """
+    Parse the AW reach JSON from response bytes, keeping only the main gadget if the whole page does not need parsing.
+    :param content: Response bytes from AW.
+    :return: Dictionary with the same nesting as the AW reach JSON.
+    """
+    if HASORJSON or not HASIJSON:
+        return _json_loads(content)
+
+    main = next(ijson.items(io.BytesIO(content), '.'.join(_AW_REACH_JSON_PATH), use_float=True), None)
+    if main is None:
+        return {}
+    return {_AW_REACH_JSON_PATH[0]: {_AW_REACH_JSON_PATH[1]: main}}
+
+
+# regular expressions used when parsing and cleaning up AW reach data, compiled once at import
+_DIFF_RE = re.compile(r'^([IV5.\d]{1,3}(?=-))?-?([IV5.\d]{1,3}[+-]?)\(?([IV5.\d]{0,3}[+-]?)')
+
+# runs of whitespace collapsed to a single space when cleaning up strings
+_WHITESPACE_RUN_RE = re.compile(r'\s{2,}')
+_ANGLE_TABLE = str.maketrans({'<': '[', '>': ']'})
+
+# anything html2text would change in a short string - tags, entities, backslashes, whitespace other than spaces, and
+# list markers at the start - so strings without any of these, no longer than the html2text line width, can skip it
+_NEEDS_HTML2TEXT_RE = re.compile(r'[<&\\]|[^\S ]|^ *(?:[-+*]|\d+\.)(?:\s|-|$)')
+_HTML2TEXT_LINE_WIDTH = 78
+
+
+@functools.lru_cache(maxsize=1024)
+def _html2text_cached(html):
+    """Convert html to markdown, remembering recent results since AW boilerplate is often repeated across reaches."""
+    return html2text(html)
+
+
 # helper for cleaning up HTML strings
 # From - https://stackoverflow.com/questions/753052/strip-html-from-strings-in-python
 class _MLStripper(HTMLParser):
@@ -60,17 +253,108 @@ class _MLStripper(HTMLParser):
         return ''.join(self.fed)
 
 
+# selectolax or lxml strip tags in compiled code, much faster than the pure python HTMLParser, if available
+HASSELECTOLAX = True if importlib.util.find_spec("selectolax") else False
+HASLXML = True if importlib.util.find_spec("lxml") else False
+if HASSELECTOLAX:
+    from selectolax.parser import HTMLParser as _FastHTMLParser
+elif HASLXML:
+    import lxml.html
+
+
 def _strip_tags(html):
+    if HASSELECTOLAX:
+        return _FastHTMLParser(html).text()
+    elif HASLXML and html.strip():
+        return lxml.html.fromstring(html).text_content()
     s = _MLStripper()
     s.feed(html)
     return s.get_data()
 
 
+# evaluating the smoothing spline is compiled with numba, if available
+HASNUMBA = True if importlib.util.find_spec("numba") else False
+
+if HASNUMBA:
+    import numba
+
+    @numba.njit(cache=True, fastmath=True)
+    def _evaluate_spline_numba(t, c, k, u):
+        """
+        Compiled de Boor evaluation of a parametric spline from splprep, avoiding the overhead of splev.
+        :param t: Knot array.
+        :param c: (n_dimensions, n_coefficients) array of spline coefficients.
+        :param k: Spline order.
+        :param u: Array of parameter values to evaluate at.
+        :return: (n, n_dimensions) array of coordinates.
+        """
+        n_coef = c.shape[1]
+        out = np.empty((u.shape[0], c.shape[0]), dtype=np.float64)
+        d = np.empty(k + 1, dtype=np.float64)
+        span = k
+
+        for idx in range(u.shape[0]):
+            x = u[idx]
+
+            # find the knot span containing the parameter, keeping the end of the range in the last span - continuing
+            # from the last span, since the parameters are almost always increasing
+            if x < t[span]:
+                span = k
+            while span < n_coef - 1 and t[span + 1] <= x:
+                span += 1
+
+            for dim in range(c.shape[0]):
+                for j in range(k + 1):
+                    d[j] = c[dim, span - k + j]
+
+                # cox-de boor recurrence
+                for r in range(1, k + 1):
+                    for j in range(k, r - 1, -1):
+                        left = t[j + span - k]
+                        denom = t[j + 1 + span - r] - left
+                        alpha = 0.0 if denom == 0.0 else (x - left) / denom
+                        d[j] = (1.0 - alpha) * d[j - 1] + alpha * d[j]
+
+                out[idx, dim] = d[k]
+
+        return out
+
+
+def _evaluate_spline(tck, u):
+    """
+    Evaluate a parametric spline from splprep.
+    :param tck: Tuple of knots, list of coefficient arrays and order returned by splprep.
+    :param u: Array of parameter values to evaluate at.
+    :return: (n, n_dimensions) array of coordinates.
+    """
+    if not HASNUMBA:
+        return np.column_stack(splev(u, tck))
+
+    t, c, k = tck
+    t = np.asarray(t, dtype=np.float64)
+    c = np.ascontiguousarray(np.asarray(c, dtype=np.float64)[:, :len(t) - k - 1])
+    return _evaluate_spline_numba(t, c, k, np.asarray(u, dtype=np.float64))
+
+
 # smoothing function for geometry
-def _smooth_geometry(geom, densify_max_segment_length=0.009, gis=None):
+def _smooth_geometry(geom, densify_max_segment_length=0.009, gis=None, use_server_simplify=False):
+    return _smooth_geometries([geom], densify_max_segment_length, gis, use_server_simplify)[0]
+
 
-    if not isinstance(geom, Polygon) and not isinstance(geom, Polyline):
-        raise Exception('Smoothing can only be performed on Esri Polygon or Polyline geometry types.')
+def _smooth_geometries(geoms, densify_max_segment_length=0.009, gis=None, use_server_simplify=False):
+    """
+    Smooth many geometries, sending all of them to the geometry service together, so smoothing any number of
+    geometries only takes one densify request, plus one simplify request if simplifying on the server.
+    :param geoms: List of Esri Polygon or Polyline geometries.
+    :param densify_max_segment_length: Maximum segment length when densifying before smoothing.
+    :param gis: Active GIS providing the geometry service.
+    :param use_server_simplify: Simplify using the geometry service instead of locally with Shapely, for output
+        identical to Esri's.
+    :return: List of smoothed geometries in the same order as the input.
+    """
+    for geom in geoms:
+        if not isinstance(geom, Polygon) and not isinstance(geom, Polyline):
+            raise TypeError('Smoothing can only be performed on Esri Polygon or Polyline geometry types.')
 
     # get a GIS instance to have a geometry service to resolve to
     if gis is None and active_gis:
@@ -78,22 +362,21 @@ def _smooth_geometry(geom, densify_max_segment_length=0.009, gis=None):
     elif gis is None and active_gis is None:
         raise Exception('An active GIS or explicitly defined GIS is required to smooth geometry.')
 
-    def _make_geometry_request(in_geom, url_extension, params):
+    def _make_geometry_request(in_geoms, url_extension, params):
 
         # create the url for making the
         url = f'{gis.properties.helperServices.geometry.url}/{url_extension}'
 
-        # make a copy to not modify the original
-        geom = deepcopy(in_geom)
+        # make shallow copies to not modify the originals - only the coordinate key is replaced, never modified in
+        # place, so the coordinates themselves do not need to be copied
+        geoms = [copy(in_geom) for in_geom in in_geoms]
 
-        # get the key for the geometry coordinates
-        geom_key = list(geom.keys())[0]
+        # get the key for the geometry coordinates for each geometry
+        geom_keys = [list(geom.keys())[0] for geom in geoms]
 
         params['geometries'] = {
             'geometryType': 'esriGeometryPolyline',
-            'geometries': [
-                {geom_key: geom[geom_key]}
-            ]
+            'geometries': [{geom_key: geom[geom_key]} for geom_key, geom in zip(geom_keys, geoms)]
         }
 
         # convert all dict or list params not at the top level of the dictionary to strings
@@ -107,10 +390,12 @@ def _smooth_geometry(geom, densify_max_segment_length=0.009, gis=None):
             try:
 
                 # make the post request
-                resp = requests.post(url, payload)
+                resp = _SESSION.post(url, payload, timeout=_TIMEOUT)
 
-                # extract out the result from the request and patch into the original geometry object
-                geom[geom_key] = resp.json()['geometries'][0][geom_key]
+                # extract out the results from the request, returned in the same order as sent, and patch into the
+                # original geometry objects
+                for geom_key, geom, resp_geom in zip(geom_keys, geoms, _json_loads(resp.content)['geometries']):
+                    geom[geom_key] = resp_geom[geom_key]
 
                 status = resp.status_code
 
@@ -118,10 +403,10 @@ def _smooth_geometry(geom, densify_max_segment_length=0.009, gis=None):
 
                 attempts = attempts + 1
 
-        # return the modified geometry object
-        return geom
+        # return the modified geometry objects
+        return geoms
 
-    def densify(in_geom):
+    def densify(in_geoms):
 
         # construct the request parameter dictionary less the geometries
         params = {
@@ -130,10 +415,10 @@ def _smooth_geometry(geom, densify_max_segment_length=0.009, gis=None):
             'maxSegmentLength': densify_max_segment_length
         }
 
-        # return the densified geometry object
-        return _make_geometry_request(in_geom, 'densify', params)
+        # return the densified geometry objects
+        return _make_geometry_request(in_geoms, 'densify', params)
 
-    def simplify(in_geom):
+    def simplify(in_geoms):
 
         # construct the request parameter dictionary less the geometries
         params = {
@@ -141,36 +426,128 @@ def _smooth_geometry(geom, densify_max_segment_length=0.009, gis=None):
             'sr': {'wkid': 4326}
         }
 
-        return _make_geometry_request(in_geom, 'simplify', params)
+        return _make_geometry_request(in_geoms, 'simplify', params)
 
     def smooth_coord_lst(coord_lst):
-        x_lst, y_lst = zip(*coord_lst)
+        coords = np.asarray(coord_lst, dtype=float)
 
+        # a smoothing spline, not an interpolating one, is what takes the jaggedness out of the line, so this stays
+        # with splprep rather than make_interp_spline, which passes through every vertex
         smoothing = 0.0005
         spline_order = 2
         knot_estimate = -1
-        tck, fp, ier, msg = splprep([x_lst, y_lst], s=smoothing, k=spline_order, nest=knot_estimate, full_output=1)
+        tck, _ = splprep([coords[:, 0], coords[:, 1]], s=smoothing, k=spline_order, nest=knot_estimate)
 
+        # evaluate both coordinates at once, and build the coordinate list from the stacked array in one pass
         zoom = 5
-        n_len = len(x_lst) * zoom
-        x_ip, y_ip = splev(np.linspace(0, 1, n_len), tck[0])
+        n_len = len(coords) * zoom
+        return _evaluate_spline(tck, np.linspace(0, 1, n_len)).tolist()
+
+    def simplify_coord_lst(coord_lst):
+
+        # douglas-peucker keeps the end points, so closed polygon rings stay closed, but do not collapse a path
+        # into too few vertices to still be valid
+        simple_line = shapely.geometry.LineString(coord_lst).simplify(simplify_tolerance, preserve_topology=False)
+        return np.asarray(simple_line.coords).tolist() if len(simple_line.coords) >= 4 else coord_lst
+
+    # densify the geometries to help with too much deflection when smoothing
+    new_geoms = densify(list(geoms))
+
+    for new_geom in new_geoms:
+
+        # get the dictionary key containing the geometry coordinate pairs
+        geom_key = list(new_geom.keys())[0]
+
+        # use the key to get all the coordinate pairs
+        new_geom[geom_key] = [smooth_coord_lst(coords) for coords in new_geom[geom_key]]
+
+    # simplify the geometries to remove unnecessary vertices, locally unless output identical to Esri's is needed,
+    # saving a round trip to the geometry service
+    if use_server_simplify:
+        new_geoms = simplify(new_geoms)
+
+    else:
+
+        # a small fraction of the densified segment length only removes vertices the spline left nearly in line
+        simplify_tolerance = densify_max_segment_length * 0.05
 
-        return [[x_ip[i], y_ip[i]] for i in range(0, len(x_ip))]
+        for new_geom in new_geoms:
+            geom_key = list(new_geom.keys())[0]
+            new_geom[geom_key] = [simplify_coord_lst(coords) for coords in new_geom[geom_key]]
 
-    # densify the geometry to help with too much deflection when smoothing
-    new_geom = densify(geom)
+    # return smoothed geometries
+    return new_geoms
 
-    # get the dictionary key containing the geometry coordinate pairs
-    geom_key = list(new_geom.keys())[0]
 
-    # use the key to get all the coordinate pairs
-    new_geom[geom_key] = [smooth_coord_lst(coords) for coords in new_geom[geom_key]]
+# snap results indexed on an integer grid of 1e-6 degrees (~11cm), so repeated snaps of the same access are only
+# requested once regardless of which WATERS instance is used, most recently used last
+_SNAP_CACHE_SIZE = 65536
+_SNAP_CACHE = OrderedDict()
+_SNAP_CACHE_LOCK = threading.Lock()
+
+
+def _snap_cache_key(x, y):
+    return int(round(x * 1e6)), int(round(y * 1e6))
+
+
+def _get_cached_snap(cache_key):
+    """helper getting a snap result from the snap cache, or None if not cached"""
+    with _SNAP_CACHE_LOCK:
+        snap = _SNAP_CACHE.get(cache_key)
+        if snap is not None:
+            _SNAP_CACHE.move_to_end(cache_key)
+        return snap
+
+
+def _set_cached_snap(cache_key, snap):
+    """helper adding a snap result to the snap cache, dropping the least recently used once the cache is full"""
+    with _SNAP_CACHE_LOCK:
+        _SNAP_CACHE[cache_key] = snap
+        _SNAP_CACHE.move_to_end(cache_key)
+        while len(_SNAP_CACHE) > _SNAP_CACHE_SIZE:
+            _SNAP_CACHE.popitem(last=False)
+
+
+class EpaRequestBatcher(object):
+    """
+    Coalesce identical EPA requests in flight at the same time, so when many reaches are processed concurrently,
+    only one request is made for each unique key and every caller waiting on the same key shares the result.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+
+    def load(self, kind, key, request_function, *args):
+        """
+        Get the result for a request, either by making it, or by waiting on the identical request already in flight.
+        :param kind: String identifying the type of request, such as "snap".
+        :param key: Hashable key uniquely identifying the request within the kind.
+        :param request_function: Function making the request.
+        :param args: Arguments passed to the request function.
+        :return: Result from the request function.
+        """
+        with self._lock:
+            future = self._pending.get((kind, key))
+            is_owner = future is None
+            if is_owner:
+                future = Future()
+                self._pending[(kind, key)] = future
+
+        # only the first caller for a key actually makes the request
+        if is_owner:
+            try:
+                future.set_result(request_function(*args))
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                with self._lock:
+                    del self._pending[(kind, key)]
+
+        return future.result()
 
-    # simplify the geometry to remove unnecessary vertices
-    new_geom = simplify(new_geom)
 
-    # return smoothed geometry
-    return new_geom
+_EPA_BATCHER = EpaRequestBatcher()
 
 
 class TraceException(Exception):
@@ -180,39 +557,78 @@ class TraceException(Exception):
     pass
 
 
+# WATERS service urls, and the request parameters the same for every request
+_POINT_INDEXING_URL = "https://ofmpub.epa.gov/waters10/PointIndexing.Service"
+_POINT_INDEXING_PARAMS = {
+    "pGeometryMod": "WKT,SRSNAME=urn:ogc:def:crs:OGC::CRS84",
+    "pPointIndexingMethod": "DISTANCE",
+    "pOutputPathFlag": True,
+    "optOutCS": "SRSNAME=urn:ogc:def:crs:OGC::CRS84",
+    "optOutPrettyPrint": 0,
+    "f": "json"
+}
+_NAVIGATION_URL = "http://ofmpub.epa.gov/waters10/Navigation.Service"
+_NAVIGATION_PARAMS = {
+    "pNavigationType": "DM",
+    "pMaxDistanceKm": 5000,
+    "pReturnFlowlineAttr": True,
+    "f": "json"
+}
+_UPDOWN_URL = "http://ofmpub.epa.gov/waters10/UpstreamDownStream.Service"
+_UPDOWN_PARAMS = {
+    "pNavigationType": "PP",
+    "pFlowlinelist": True,
+    "f": "json"
+}
+
+
 class WATERS(object):
 
     @staticmethod
     def _get_point_indexing(x, y, search_distance=5, return_geometry=False):
         """
         Get the raw response JSON for snapping points to hydrolines from the WATERS Point Indexing Service
-            (https://www.epa.gov/waterdata/point-indexing-service)
+            (https://www.epa.gov/waterdata/point-indexing-service). Responses are cached using the coordinates
+            rounded to six decimal places, keeping only successful responses.
         :param x: X coordinate (longitude) in decimal degrees (WGS84)
         :param y: Y coordinate (latitude) in decimal degrees (WGS84)
         :param search_distance: Distance radius to search for a hydroline to snap to in kilometers (default 5km)
         :param return_geometry: Whether or not to return the geometry of the matching hydroline (default False)
         :return: Raw response JSON as a dictionary
         """
-        url = "https://ofmpub.epa.gov/waters10/PointIndexing.Service"
-
-        query_string = {
-            "pGeometry": "POINT({} {})".format(x, y),
-            "pGeometryMod": "WKT,SRSNAME=urn:ogc:def:crs:OGC::CRS84",
-            "pPointIndexingMethod": "DISTANCE",
-            "pPointIndexingMaxDist": search_distance,
-            "pOutputPathFlag": True,
-            "pReturnFlowlineGeomFlag": return_geometry,
-            "optOutCS": "SRSNAME=urn:ogc:def:crs:OGC::CRS84",
-            "optOutPrettyPrint": 0,
-            "f": "json"
-        }
+        disk_cache = _get_disk_cache() if CACHE_ENABLED else None
+        if disk_cache is None:
+            return WATERS._request_point_indexing(x, y, search_distance, return_geometry)
+
+        # the rounded coordinates are only the key, and the request is made with the coordinates as provided
+        cache_key = ('point_indexing', round(x, 6), round(y, 6), search_distance, return_geometry)
+        response_json = disk_cache.get(cache_key)
+        if response_json is not None:
+            return response_json
+
+        response_json = WATERS._request_point_indexing(x, y, search_distance, return_geometry)
+
+        # only keep successful responses, since an error from the service has no output, the same as a point not in NHD
+        if (response_json.get('status') or {}).get('status_code') == 0:
+            disk_cache.set(cache_key, response_json, expire=_POINT_INDEXING_CACHE_EXPIRE)
 
-        response = requests.get(
-            url=url,
-            params=query_string
+        return response_json
+
+    @staticmethod
+    def _request_point_indexing(x, y, search_distance, return_geometry):
+        """
+        Make the request to the WATERS Point Indexing Service.
+        """
+        query_string = dict(
+            _POINT_INDEXING_PARAMS,
+            pGeometry=f"POINT({x} {y})",
+            pPointIndexingMaxDist=search_distance,
+            pReturnFlowlineGeomFlag=return_geometry
         )
 
-        return response.json()
+        response = _SESSION.get(_POINT_INDEXING_URL, params=query_string, timeout=_TIMEOUT)
+
+        return _json_loads(response.content)
 
     def get_epa_snap_point(self, x, y):
         """
@@ -222,24 +638,96 @@ class WATERS(object):
         :return: Dictionary with three keys; geometry, measure, and id. Geometry is an ArcGIS Python API Point Geometry
         object. Measure and ID are values required as input parameters when using tracing WATER services.
         """
+        # check if this location has already been snapped
+        cache_key = _snap_cache_key(x, y)
+        snap = _get_cached_snap(cache_key) if CACHE_ENABLED else None
+
+        # if not, request it, sharing the request with any other caller snapping the same location at the same time
+        if snap is None:
+            snap = _EPA_BATCHER.load('snap', cache_key, self._request_snap_point, x, y)
+
+            # only keep points actually snapped, so a location the service failed on is requested again
+            if snap and CACHE_ENABLED:
+                _set_cached_snap(cache_key, snap)
+
+        if not snap:
+            return False
+
+        # construct a Point geometry along with sending back the ComID and Measure needed for tracing
+        return {
+            "geometry": Geometry({'x': snap[0], 'y': snap[1], 'spatialReference': {"wkid": 4326}}),
+            "measure": snap[2],
+            "id": snap[3]
+        }
+
+    def _request_snap_point(self, x, y):
+        """
+        Snap a point using the EPA's Point Indexing service.
+        :param x: X coordinate (longitude) in decimal degrees (WGS84)
+        :param y: Y coordinate (latitude) in decimal degrees (WGS84)
+        :return: Tuple of snapped x, y, measure and ComID, or False if the point could not be snapped.
+        """
         # hit the EPA's Point Indexing service to true up the point
         response_json = self._get_point_indexing(x, y)
 
         # if the point is not in the area covered by NHD (likely in Canada)
-        if response_json['output'] is None:
+        output = response_json.get('output')
+        if output is None:
             return False
 
-        else:
+        # extract the coordinates, measure and ComID for the snapped location
+        coordinates = output['end_point']['coordinates']
+        flowline = output['ary_flowlines'][0]
+        return coordinates[0], coordinates[1], flowline['fmeasure'], flowline['comid']
+
+    @staticmethod
+    def save_snap_cache(filename):
+        """
+        Persist the snap results retrieved so far to a shelve file for reuse in subsequent runs.
+        :param filename: Path to the shelve file.
+        :return: Integer count of snap results saved.
+        """
+        with _SNAP_CACHE_LOCK:
+            snaps = list(_SNAP_CACHE.items())
+        with shelve.open(filename) as snap_db:
+            for (x_key, y_key), snap in snaps:
+                snap_db[f'{x_key},{y_key}'] = snap
+        return len(snaps)
+
+    @staticmethod
+    def load_snap_cache(filename):
+        """
+        Load snap results saved using save_snap_cache, so previously snapped locations are not requested again.
+        :param filename: Path to the shelve file.
+        :return: Integer count of snap results loaded.
+        """
+        count = 0
+        with shelve.open(filename, flag='r') as snap_db:
+            for key, snap in snap_db.items():
+
+                # files saved before failures stopped being cached may still have them, so skip these
+                if not snap:
+                    continue
+                x_key, y_key = key.split(',')
+                _set_cached_snap((int(x_key), int(y_key)), snap)
+                count += 1
+        return count
 
-            # extract out the coordinates
-            coordinates = response_json['output']['end_point']['coordinates']
+    @staticmethod
+    def invalidate_cache(x, y):
+        """
+        Discard any cached snap for a location, so it is requested from the Point Indexing Service again.
+        :param x: X coordinate (longitude) in decimal degrees (WGS84)
+        :param y: Y coordinate (latitude) in decimal degrees (WGS84)
+        :return:
+        """
+        with _SNAP_CACHE_LOCK:
+            _SNAP_CACHE.pop(_snap_cache_key(x, y), None)
 
-            # construct a Point geometry along with sending back the ComID and Measure needed for tracing
-            return {
-                "geometry": Geometry({'x': coordinates[0], 'y': coordinates[1], 'spatialReference': {"wkid": 4326}}),
-                "measure": response_json["output"]["ary_flowlines"][0]["fmeasure"],
-                "id": response_json["output"]["ary_flowlines"][0]["comid"]
-            }
+        disk_cache = _get_disk_cache()
+        if disk_cache is not None:
+            for return_geometry in (False, True):
+                disk_cache.delete(('point_indexing', round(x, 6), round(y, 6), 5, return_geometry))
 
     @staticmethod
     def _get_epa_downstream_navigation_response(putin_epa_reach_id, putin_epa_measure):
@@ -253,35 +741,19 @@ class WATERS(object):
         :return: Raw response object from REST call.
         """
 
-        # url for the REST call
-        url = "http://ofmpub.epa.gov/waters10/Navigation.Service"
-
         # input parameters as documented at https://www.epa.gov/waterdata/navigation-service
-        query_string = {
-            "pNavigationType": "DM",
-            "pStartComID": putin_epa_reach_id,
-            "pStartMeasure": putin_epa_measure,
-            "pMaxDistanceKm": 5000,
-            "pReturnFlowlineAttr": True,
-            "f": "json"
-        }
-
-        # since requests don't always work, enable repeated tries up to 10
-        attempts = 0
-        status_code = 0
-
-        while attempts < 10 and status_code != 200:
-
-            # make the actual response to the REST endpoint
-            resp = requests.get(url, query_string)
+        query_string = dict(
+            _NAVIGATION_PARAMS,
+            pStartComID=putin_epa_reach_id,
+            pStartMeasure=putin_epa_measure
+        )
 
-            # increment the attempts and pull out the status code
-            attempts = attempts + 1
-            status_code = resp.status_code
+        # make the actual response to the REST endpoint, with the session adapter retrying failed requests
+        resp = _get_waters_session().get(_NAVIGATION_URL, params=query_string, timeout=_TIMEOUT)
 
-            # if the status code is anything other than 200, provide a message of status
-            if status_code != 200:
-                print('Attempt {:02d} failed with status code {}'.format(attempts, status_code))
+        # if the status code is anything other than 200 after retrying, provide a message of status
+        if resp.status_code != 200:
+            print('Request failed with status code {}'.format(resp.status_code))
 
         return resp
 
@@ -302,39 +774,89 @@ class WATERS(object):
         :return: Raw response object from REST call.
         """
 
-        # url for the REST call
-        url = "http://ofmpub.epa.gov/waters10/Navigation.Service"
-
         # input parameters as documented at https://www.epa.gov/waterdata/upstreamdownstream-search-service
-        url = "http://ofmpub.epa.gov/waters10/UpstreamDownStream.Service"
-        query_string = {
-            "pNavigationType": "PP",
-            "pStartComID": putin_epa_reach_id,
-            "pStartMeasure": putin_epa_measure,
-            "pStopComID": takeout_epa_reach_id,
-            "pStopMeasure": takeout_epa_measure,
-            "pFlowlinelist": True,
-            "f": "json"
-        }
+        query_string = dict(
+            _UPDOWN_PARAMS,
+            pStartComID=putin_epa_reach_id,
+            pStartMeasure=putin_epa_measure,
+            pStopComID=takeout_epa_reach_id,
+            pStopMeasure=takeout_epa_measure
+        )
 
-        # since requests don't always work, enable repeated tries up to 10
-        attempts = 0
-        status_code = 0
+        # make the actual response to the REST endpoint, with the session adapter retrying failed requests
+        resp = _get_waters_session().get(_UPDOWN_URL, params=query_string, timeout=_TIMEOUT)
 
-        while attempts < 10 and status_code != 200:
+        # if the status code is anything other than 200 after retrying, provide a message of status
+        if resp.status_code != 200:
+            print('Request failed with status code {}'.format(resp.status_code))
 
-            # make the actual response to the REST endpoint
-            resp = requests.get(url, query_string)
+        return resp
 
-            # increment the attempts and pull out the status code
-            attempts = attempts + 1
-            status_code = resp.status_code
+    @staticmethod
+    def _get_flowline_chain_order(coord_arrays):
+        """
+        Find the order joining the flowlines end to end into a single line by matching endpoints snapped to 1e-6
+            degrees, in a single pass regardless of the order the flowlines were returned in.
+        :param coord_arrays: List of (N, 2) coordinate arrays, one for each flowline.
+        :return: List of flowline indices in upstream to downstream order, or None if the flowlines do not form a
+            single unbranched chain.
+        """
+        def endpoint_key(coord):
+            return round(coord[0], 6), round(coord[1], 6)
+
+        # index the flowlines by start point, giving up if the network branches
+        start_lookup = {}
+        for idx, arr in enumerate(coord_arrays):
+            start_key = endpoint_key(arr[0])
+            if start_key in start_lookup:
+                return None
+            start_lookup[start_key] = idx
 
-            # if the status code is anything other than 200, provide a message of status
-            if status_code != 200:
-                print('Attempt {:02d} failed with status code {}'.format(attempts, status_code))
+        # the head of the chain is the only flowline not starting where another one ends
+        end_keys = set(endpoint_key(arr[-1]) for arr in coord_arrays)
+        heads = [idx for idx, arr in enumerate(coord_arrays) if endpoint_key(arr[0]) not in end_keys]
+        if len(heads) != 1:
+            return None
 
-        return resp
+        # walk downstream from the head
+        chain_order = [heads[0]]
+        next_idx = start_lookup.get(endpoint_key(coord_arrays[heads[0]][-1]))
+        while next_idx is not None and len(chain_order) < len(coord_arrays):
+            chain_order.append(next_idx)
+            next_idx = start_lookup.get(endpoint_key(coord_arrays[next_idx][-1]))
+
+        return chain_order if len(chain_order) == len(coord_arrays) else None
+
+    @staticmethod
+    def _flowlines_to_esri_polyline(flowlines):
+        """
+        Combine the flowlines from a WATERS trace response into a single ArcGIS Python API Line Geometry object.
+        :param flowlines: List of flowline dictionaries, each with a GeoJSON shape.
+        :return: Single continuous ArcGIS Python API Line Geometry object.
+        """
+        # the flowlines form a single chain, so try to simply join the coordinates end to end
+        if all(flowline['shape']['type'] == 'LineString' for flowline in flowlines):
+            coord_arrays = [np.asarray(flowline['shape']['coordinates'], dtype=np.float64) for flowline in flowlines]
+            chain_order = WATERS._get_flowline_chain_order(coord_arrays)
+
+            if chain_order is not None:
+
+                # drop the first vertex of each subsequent flowline, since it is shared with the previous flowline
+                coords = np.concatenate(
+                    [coord_arrays[chain_order[0]]] + [coord_arrays[idx][1:] for idx in chain_order[1:]]
+                ).tolist()
+                return Polyline({'paths': [coords], 'spatialReference': {'wkid': 4326}})
+
+        # if the flowlines do not connect end to end in order, fall back to using Shapely to combine them
+        flowline_list = [shapely.geometry.shape(flowline['shape']) for flowline in flowlines]
+        flowline = shapely.ops.linemerge(flowline_list)
+
+        # if the flowlines could not all be merged into one line, keep each merged part as a path
+        lines = flowline.geoms if flowline.geom_type == 'MultiLineString' else [flowline]
+
+        # convert the lines to a Polyline, and return the result
+        paths = [np.asarray(line.coords).tolist() for line in lines]
+        return Polyline({'paths': paths, 'spatialReference': {'wkid': 4326}})
 
     @staticmethod
     def _epa_navigation_response_to_esri_polyline(navigation_response):
@@ -343,22 +865,11 @@ class WATERS(object):
         :param navigation_response: Raw trace response received from the REST endpoint.
         :return: Single continuous ArcGIS Python API Line Geometry object.
         """
-        resp_json = navigation_response.json()
+        resp_json = _json_loads(navigation_response.content)
 
         # if any flowlines were found, combine all the coordinate pairs into a single continuous line
         if resp_json['output']['ntNavResultsStandard']:
-
-            # extract the dict descriptions of the geometries and convert to Shapely geometries
-            flowline_list = [shapely.geometry.shape(flowline['shape'])
-                             for flowline in resp_json['output']['ntNavResultsStandard']]
-
-            # use Shapely to combine all the lines into a single line
-            flowline = shapely.ops.linemerge(flowline_list)
-
-            # convert the LineString to a Polyline, and return the result
-            arcgis_geometry = Polyline({'paths': [[c for c in flowline.coords]], 'spatialReference': {'wkid': 4326}})
-
-            return arcgis_geometry
+            return WATERS._flowlines_to_esri_polyline(resp_json['output']['ntNavResultsStandard'])
 
         # if no geometry is found, puke
         else:
@@ -371,22 +882,11 @@ class WATERS(object):
         :param updown_response: Raw trace response received from the REST endpoint.
         :return: Single continuous ArcGIS Python API Line Geometry object.
         """
-        resp_json = updown_response.json()
+        resp_json = _json_loads(updown_response.content)
 
         # if any flowlines were found, combine all the coordinate pairs into a single continuous line
         if resp_json['output']['flowlines_traversed']:
-
-            # extract the dict descriptions of the geometries and convert to Shapely geometries
-            flowline_list = [shapely.geometry.shape(flowline['shape'])
-                             for flowline in resp_json['output']['flowlines_traversed']]
-
-            # use Shapely to combine all the lines into a single line
-            flowline = shapely.ops.linemerge(flowline_list)
-
-            # convert the LineString to a Polyline, and return the result
-            arcgis_geometry = Polyline({'paths': [[c for c in flowline.coords]], 'spatialReference': {'wkid': 4326}})
-
-            return arcgis_geometry
+            return WATERS._flowlines_to_esri_polyline(resp_json['output']['flowlines_traversed'])
 
         # if no geometry is found, puke
         else:
@@ -423,9 +923,178 @@ class WATERS(object):
                                                  takeout_epa_measure)
         return self._epa_updown_response_to_esri_polyline(resp)
 
+    @staticmethod
+    def _run_batch(function, args_list, max_workers):
+        """
+        Call a function with each set of arguments on a thread pool, since the calls are almost entirely waiting on
+        the WATERS services. A failure for one set of arguments does not stop the others.
+        :param function: Function to call.
+        :param args_list: List of argument tuples.
+        :param max_workers: Maximum number of calls made at the same time.
+        :return: List of results in the same order as the arguments, with None for any call raising an exception.
+        """
+        def call(args):
+            try:
+                return function(*args)
+            except Exception as e:
+                print(f'WATERS request failed for {args}: {e}')
+                return None
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(call, args_list))
+
+    def snap_points_batch(self, xy_list, max_workers=16):
+        """
+        Snap many locations at the same time, sharing the pooled connection to the EPA WATERS services.
+        :param xy_list: Iterable of (x, y) coordinate tuples in decimal degrees (WGS84).
+        :param max_workers: Integer - Optional
+            Maximum number of requests made at the same time.
+        :return: List of snap results from get_epa_snap_point in the same order as the input, with None where the
+            request failed.
+        """
+        return self._run_batch(self.get_epa_snap_point, [tuple(xy) for xy in xy_list], max_workers)
+
+    def trace_ptp_batch(self, ptp_list, max_workers=16):
+        """
+        Trace many reaches between the put-in and take-out at the same time, sharing the pooled connection to the
+        EPA WATERS services.
+        :param ptp_list: Iterable of (putin_epa_reach_id, putin_epa_measure, takeout_epa_reach_id,
+            takeout_epa_measure) tuples.
+        :param max_workers: Integer - Optional
+            Maximum number of requests made at the same time.
+        :return: List of polylines from get_updown_ptp_polyline in the same order as the input, with None where the
+            trace failed.
+        """
+        return self._run_batch(self.get_updown_ptp_polyline, [tuple(ptp) for ptp in ptp_list], max_workers)
+
+
+@functools.lru_cache(maxsize=1)
+def _waters():
+    """Single WATERS client shared by all snapping calls."""
+    return WATERS()
+
+
+def _wgs84_point(x, y):
+    """
+    Create a point in WGS84 from coordinates in decimal degrees.
+    :param x: X coordinate (longitude) in decimal degrees.
+    :param y: Y coordinate (latitude) in decimal degrees.
+    :return: ArcGIS Python API Point Geometry object.
+    """
+    # the spatial reference is not shared between points, since geometries can be modified in place
+    return Point({'x': float(x), 'y': float(y), 'spatialReference': {'wkid': 4326}})
+
+
+@functools.lru_cache(maxsize=None)
+def _get_settable_fields(cls):
+    """
+    Get the names of the public attributes which can be set on instances of a class, the slots and the properties
+    with setters, so matching columns to attributes does not need to look up every column on the instance.
+    :param cls: Class to get the attribute names for.
+    :return: Frozenset of attribute names.
+    """
+    settable = set()
+    for klass in cls.__mro__:
+        settable.update(name for name in getattr(klass, '__slots__', ()) if not name.startswith('_'))
+        settable.update(name for name, value in vars(klass).items()
+                        if isinstance(value, property) and value.fset is not None and not name.startswith('_'))
+    return frozenset(settable)
+
+
+# numeric values for the maximum difficulty, so reaches can be filtered by difficulty
+_DIFFICULTY_FILTER = {
+    'I':    1.1,
+    'I+':   1.2,
+    'II-':  2.0,
+    'II':   2.1,
+    'II+':  2.2,
+    'III-': 3.0,
+    'III':  3.1,
+    'III+': 3.2,
+    'IV-':  4.0,
+    'IV':   4.1,
+    'IV+':  4.2,
+    'V-':   5.0,
+    'V':    5.1,
+    'V+':   5.3
+}
+
+# names for the stages between the sorted gauge ranges, keyed by the number of ranges, and for an odd number of
+# ranges, whether there are more low or high ranges
+_GAUGE_STAGE_LABELS = {
+    3: ('lower runnable', 'higher runnable'),
+    4: ('low', 'medium', 'high'),
+    (5, 'low'): ('very low', 'medium low', 'medium', 'high'),
+    (5, 'high'): ('low', 'medium', 'medium high', 'very high'),
+    6: ('low', 'medium low', 'medium', 'medium high', 'high'),
+    (7, 'low'): ('very low', 'low', 'medium low', 'medium', 'medium high', 'high'),
+    (7, 'high'): ('low', 'medium low', 'medium', 'medium high', 'high', 'very high'),
+    8: ('very low', 'low', 'medium low', 'medium', 'medium high', 'high', 'very high'),
+    (9, 'low'): ('extremely low', 'very low', 'low', 'medium low', 'medium', 'medium high', 'high', 'very high'),
+    (9, 'high'): ('very low', 'low', 'medium low', 'medium', 'medium high', 'high', 'very high', 'extremely high'),
+    10: ('extremely low', 'very low', 'low', 'medium low', 'medium', 'medium high', 'high', 'very high',
+         'extremely high'),
+}
+
+
+# symbols used for drawing reaches on a web map
+_LINE_SYMBOL = {
+    "type": "esriSLS",
+    "style": "esriSLSSolid",
+    "color": [0, 0, 255, 255],
+    "width": 1.5
+}
+_PUTIN_SYMBOL = {
+    "xoffset": 12,
+    "yoffset": 12,
+    "type": "esriPMS",
+    "url": "http://static.arcgis.com/images/Symbols/Basic/GreenFlag.png",
+    "contentType": "image/png",
+    "width": 24,
+    "height": 24
+}
+_TAKEOUT_SYMBOL = {
+    "xoffset": 12,
+    "yoffset": 12,
+    "type": "esriPMS",
+    "url": "http://static.arcgis.com/images/Symbols/Basic/RedFlag.png",
+    "contentType": "image/png",
+    "width": 24,
+    "height": 24
+}
+_CENTROID_SYMBOL = {
+    "type": "esriPMS",
+    "url": "http://static.arcgis.com/images/Symbols/Basic/CircleX.png",
+    "contentType": "image/png",
+    "width": 24,
+    "height": 24
+}
+
 
 class Reach(object):
 
+    __slots__ = (
+        'reach_id', 'reach_name', 'reach_name_alternate', 'reach_alternate_name', 'river_name', 'river_name_alternate',
+        'error', 'notes', 'difficulty', 'difficulty_minimum', 'difficulty_maximum', 'difficulty_outlier', '_abstract',
+        '_description', '_raw_reach_info', 'update_aw', 'update_arcgis', 'validated', 'validated_by', '_geometry',
+        '_reach_points', '_reach_json', 'agency', 'huc', 'length', 'gauge_observation', 'gauge_id', 'gauge_units',
+        'gauge_metric',
+        'gauge_r0', 'gauge_r1', 'gauge_r2', 'gauge_r3', 'gauge_r4', 'gauge_r5', 'gauge_r6', 'gauge_r7', 'gauge_r8',
+        'gauge_r9', 'tracing_method', 'trace_source', '_version', '_memo'
+    )
+
+    # attributes exported with features - the public slots plus the derived scalar properties
+    _FEATURE_FIELDS = tuple(key for key in __slots__ if not key.startswith('_')) + (
+        'abstract', 'description', 'putin_x', 'putin_y', 'takeout_x', 'takeout_y', 'difficulty_filter', 'centroid',
+        'extent', 'reach_search', 'gauge_min', 'gauge_max', 'gauge_runnable', 'gauge_stage'
+    )
+
+    def __setattr__(self, key, value):
+        # any change to the reach invalidates memoized values derived from it
+        object.__setattr__(self, key, value)
+        if key != '_version' and key != '_memo':
+            object.__setattr__(self, '_version', getattr(self, '_version', 0) + 1)
+
     def __init__(self, reach_id):
 
         self.reach_id = str(reach_id)
@@ -439,15 +1108,20 @@ class Reach(object):
         self.difficulty_minimum = ''
         self.difficulty_maximum = ''
         self.difficulty_outlier = ''
-        self.abstract = ''
-        self.description = ''
+        self._raw_reach_info = None  # AW reach info with the description and abstract not yet converted from html
+        self._abstract = ''
+        self._description = ''
         self.update_aw = None  # datetime
         self.update_arcgis = None  # datetime
         self.validated = None  # boolean
         self.validated_by = ''
         self._geometry = None
         self._reach_points = []
+        self._reach_json = None
+        self.reach_alternate_name = None
         self.agency = None
+        self.huc = None
+        self.length = None
         self.gauge_observation = None
         self.gauge_id = None
         self.gauge_units = None
@@ -464,6 +1138,8 @@ class Reach(object):
         self.gauge_r9 = None
         self.tracing_method = None
         self.trace_source = None
+        self._version = 0  # incremented whenever the reach or its reach points, which notify the reach, change
+        self._memo = {}
 
     def __str__(self):
         return f'{self.river_name} - {self.reach_name} - {self.difficulty}'
@@ -471,6 +1147,27 @@ class Reach(object):
     def __repr__(self):
         return f'{self.__class__.__name__ } ({self.river_name} - {self.reach_name} - {self.difficulty})'
 
+    def _memoized(self, name, compute):
+        """
+        Get a derived value, only computing it again if the reach geometry or any of the reach points have changed.
+        :param name: Key the value is stored under.
+        :param compute: Function computing the value.
+        :return: The derived value.
+        """
+        # the reach points bump the reach version when changed, so checking the version alone covers them as well
+        version = self._version
+        memo = self._memo.get(name)
+        if memo is None or memo[0] != version:
+            memo = (version, compute())
+            self._memo[name] = memo
+        return memo[1]
+
+    def _add_reach_point(self, reach_point):
+        """helper adding a reach point to the reach, so the point notifies the reach whenever the point changes"""
+        reach_point._reach = self
+        self._reach_points.append(reach_point)
+        self._version += 1
+
     @property
     def putin_x(self):
         return self.putin.geometry.x
@@ -489,23 +1186,7 @@ class Reach(object):
 
     @property
     def difficulty_filter(self):
-        lookup_dict = {
-            'I':    1.1,
-            'I+':   1.2,
-            'II-':  2.0,
-            'II':   2.1,
-            'II+':  2.2,
-            'III-': 3.0,
-            'III':  3.1,
-            'III+': 3.2,
-            'IV-':  4.0,
-            'IV':   4.1,
-            'IV+':  4.2,
-            'V-':   5.0,
-            'V':    5.1,
-            'V+':   5.3
-        }
-        return lookup_dict[self.difficulty_maximum]
+        return _DIFFICULTY_FILTER[self.difficulty_maximum]
 
     @property
     def reach_points_as_features(self):
@@ -513,15 +1194,25 @@ class Reach(object):
         Get all the reach points as a list of features.
         :return: List of ArcGIS Python API Feature objects.
         """
+        # created new for each call, since callers modify the features, such as adding the OBJECTID before updating
         return [pt.as_feature for pt in self._reach_points]
 
+    def _get_reach_point_columns(self):
+        """helper function filling the columns for each reach point field directly, not a dictionary per point"""
+        pts = self._reach_points
+        columns = {key: [getattr(pt, key, None) for pt in pts] for key in ReachPoint._FEATURE_FIELDS}
+        columns['SHAPE'] = [pt.geometry for pt in pts]
+        return columns
+
     @property
     def reach_points_as_dataframe(self):
         """
         Get the reach points as an Esri Spatially Enabled Pandas DataFrame.
         :return:
         """
-        df_pt = pd.DataFrame([pt.as_dictionary for pt in self._reach_points])
+        # the columns are kept until the reach points change, and a new data frame is created from them for each call,
+        # so changes to one data frame do not show up in the next
+        df_pt = pd.DataFrame(self._memoized('reach_point_columns', self._get_reach_point_columns))
         df_pt.spatial.set_geometry('SHAPE')
         return df_pt
 
@@ -533,31 +1224,30 @@ class Reach(object):
         :return: Point Geometry
             Centroid representing the reach location as a point.
         """
-        # if the hydroline is defined, use the centroid of the hydroline
-        if isinstance(self.geometry, Polyline):
-            return Geometry({
-                'x': np.mean([self.putin.geometry.x, self.takeout.geometry.x]),
-                'y': np.mean([self.putin.geometry.y, self.takeout.geometry.y]),
-                'spatialReference': self.putin.geometry.spatial_reference
-            })
+        return self._memoized('centroid', self._get_centroid)
 
-        # if both accesses are defined, use the mean of the accesses
-        elif isinstance(self.putin, ReachPoint) and isinstance(self.takeout, ReachPoint):
+    def _get_centroid(self):
+        # look up the accesses once, since each is a search through the reach points
+        putin, takeout = self.putin, self.takeout
+
+        # if the hydroline is defined, or if both accesses are defined, use the mean of the accesses
+        if isinstance(self.geometry, Polyline) or (isinstance(putin, ReachPoint) and isinstance(takeout, ReachPoint)):
+            putin_geom, takeout_geom = putin.geometry, takeout.geometry
 
             # create a point geometry using the average coordinates
             return Geometry({
-                'x': np.mean([self.putin.geometry.x, self.takeout.geometry.x]),
-                'y': np.mean([self.putin.geometry.y, self.takeout.geometry.y]),
-                'spatialReference': self.putin.geometry.spatial_reference
+                'x': (putin_geom.x + takeout_geom.x) * 0.5,
+                'y': (putin_geom.y + takeout_geom.y) * 0.5,
+                'spatialReference': putin_geom.spatial_reference
             })
 
         # if only the putin is defined, use that
-        elif isinstance(self.putin, ReachPoint):
-            return self.putin.geometry
+        elif isinstance(putin, ReachPoint):
+            return putin.geometry
 
         # and if on the takeout is defined, likely the person digitizing was taking too many hits from the bong
-        elif isinstance(self.takeout, ReachPoint):
-            return self.takeout.geometry
+        elif isinstance(takeout, ReachPoint):
+            return takeout.geometry
 
         else:
             return None
@@ -568,12 +1258,24 @@ class Reach(object):
         Provide the extent of the reach as (xmin, ymin, xmax, ymax)
         :return: Set (xmin, ymin, xmax, ymax)
         """
-        return (
-            min(self.putin.geometry.x, self.takeout.geometry.x),
-            min(self.putin.geometry.y, self.takeout.geometry.y),
-            max(self.putin.geometry.x, self.takeout.geometry.x),
-            max(self.putin.geometry.y, self.takeout.geometry.y),
-        )
+        return self._memoized('extent', self._get_extent)
+
+    def _get_extent(self):
+
+        # look up the coordinates once, since each access is a search through the reach points
+        putin_geom, takeout_geom = self.putin.geometry, self.takeout.geometry
+        pix, piy = putin_geom.x, putin_geom.y
+        tox, toy = takeout_geom.x, takeout_geom.y
+
+        return min(pix, tox), min(piy, toy), max(pix, tox), max(piy, toy)
+
+    @property
+    def bbox(self):
+        """
+        Provide the bounding box of the traced reach geometry as (xmin, ymin, xmax, ymax)
+        :return: Tuple (xmin, ymin, xmax, ymax), or None if the reach does not have a geometry
+        """
+        return self._memoized('bbox', lambda: tuple(self._geometry.extent) if self._geometry else None)
 
     @property
     def reach_search(self):
@@ -597,50 +1299,57 @@ class Reach(object):
         else:
             return False
 
+    def _get_gauge_ranges(self):
+        """
+        Helper getting the sorted unique gauge range values, all together and split into the low and high ranges,
+        along with the minimum and maximum runnable values. Reused until any gauge range changes.
+        :return: Tuple (metrics, low_metrics, high_metrics, gauge_min, gauge_max)
+        """
+        return self._memoized('gauge_ranges', self._compute_gauge_ranges)
+
+    def _compute_gauge_ranges(self):
+        # gather the ten range values into one array with missing values as nan, so the metrics, minimum and
+        # maximum are all vector operations on slices of the same array
+        values = np.array([self.gauge_r0, self.gauge_r1, self.gauge_r2, self.gauge_r3, self.gauge_r4, self.gauge_r5,
+                           self.gauge_r6, self.gauge_r7, self.gauge_r8, self.gauge_r9], dtype=np.float64)
+
+        def get_metrics(range_values):
+            return np.unique(range_values[~np.isnan(range_values)]).tolist()
+
+        def get_extreme(range_values, function):
+            return float(function(range_values)) if not np.isnan(range_values).all() else None
+
+        return (
+            get_metrics(values),
+            get_metrics(values[:6]),
+            get_metrics(values[5:]),
+            get_extreme(values[:6], np.nanmin),
+            get_extreme(values[4:], np.nanmax)
+        )
+
     @property
     def gauge_min(self):
-        gauge_min_lst = [self.gauge_r0, self.gauge_r1, self.gauge_r2, self.gauge_r3, self.gauge_r4, self.gauge_r5]
-        gauge_min_lst = [val for val in gauge_min_lst if val is not None]
-        if len(gauge_min_lst):
-            return min(gauge_min_lst)
-        else:
-            return None
+        return self._get_gauge_ranges()[3]
 
     @property
     def gauge_max(self):
-        gauge_max_lst = [self.gauge_r4, self.gauge_r5, self.gauge_r6, self.gauge_r7, self.gauge_r8, self.gauge_r9]
-        gauge_max_lst = [val for val in gauge_max_lst if val is not None]
-        if len(gauge_max_lst):
-            return max(gauge_max_lst)
-        else:
-            return None
+        return self._get_gauge_ranges()[4]
 
     @property
     def gauge_runnable(self):
-        if (self.gauge_min and self.gauge_max and self.gauge_observation) and \
-                (self.gauge_min < self.gauge_observation < self.gauge_max):
+        _, _, _, gauge_min, gauge_max = self._get_gauge_ranges()
+        if (gauge_min and gauge_max and self.gauge_observation) and \
+                (gauge_min < self.gauge_observation < gauge_max):
             return True
         else:
             return False
 
     @property
     def gauge_stage(self):
-        metric_keys = ['gauge_r0', 'gauge_r1', 'gauge_r2', 'gauge_r3', 'gauge_r4', 'gauge_r5', 'gauge_r6', 'gauge_r7',
-                       'gauge_r8', 'gauge_r9']
-
-        def get_metrics(metric_keys):
-            metrics = [getattr(self, key) for key in metric_keys]
-            metrics = list(set(val for val in metrics if val is not None))
-            metrics.sort()
-            return metrics
-
-        metrics = get_metrics(metric_keys)
+        metrics, low_metrics, high_metrics, _, _ = self._get_gauge_ranges()
         if not len(metrics):
             return None
 
-        low_metrics = get_metrics(metric_keys[:6])
-        high_metrics = get_metrics(metric_keys[5:])
-
         if not self.gauge_observation:
             return 'no gauge reading'
 
@@ -652,175 +1361,50 @@ class Reach(object):
         if len(metrics) == 2 or (len(metrics) == 1 and len(high_metrics) > 0):
             return 'runnable'
 
-        if len(metrics) == 3:
-            if metrics[0] < self.gauge_observation < metrics[1]:
-                return 'lower runnable'
-            if metrics[1] < self.gauge_observation < metrics[2]:
-                return 'higher runnable'
-
-        if len(metrics) == 4:
-            if metrics[0] < self.gauge_observation < metrics[1]:
-                return 'low'
-            if metrics[1] < self.gauge_observation < metrics[2]:
-                return 'medium'
-            if metrics[2] < self.gauge_observation < metrics[3]:
-                return 'high'
-
-        if len(metrics) == 5 and len(low_metrics) > len(high_metrics):
-            if metrics[0] < self.gauge_observation < metrics[1]:
-                return 'very low'
-            if metrics[1] < self.gauge_observation < metrics[2]:
-                return 'medium low'
-            if metrics[2] < self.gauge_observation < metrics[3]:
-                return 'medium'
-            if metrics[3] < self.gauge_observation < metrics[4]:
-                return 'high'
-
-        if len(metrics) == 5 and len(low_metrics) < len(high_metrics):
-            if metrics[0] < self.gauge_observation < metrics[1]:
-                return 'low'
-            if metrics[1] < self.gauge_observation < metrics[2]:
-                return 'medium'
-            if metrics[2] < self.gauge_observation < metrics[3]:
-                return 'medium high'
-            if metrics[3] < self.gauge_observation < metrics[4]:
-                return 'very high'
-
-        if len(metrics) == 6:
-            if metrics[0] < self.gauge_observation < metrics[1]:
-                return 'low'
-            if metrics[1] < self.gauge_observation < metrics[2]:
-                return 'medium low'
-            if metrics[2] < self.gauge_observation < metrics[3]:
-                return 'medium'
-            if metrics[3] < self.gauge_observation < metrics[4]:
-                return 'medium high'
-            if metrics[4] < self.gauge_observation < metrics[5]:
-                return 'high'
-
-        if len(metrics) == 7 and len(low_metrics) > len(high_metrics):
-            if metrics[0] < self.gauge_observation < metrics[1]:
-                return 'very low'
-            if metrics[1] < self.gauge_observation < metrics[2]:
-                return 'low'
-            if metrics[2] < self.gauge_observation < metrics[3]:
-                return 'medium low'
-            if metrics[3] < self.gauge_observation < metrics[4]:
-                return 'medium'
-            if metrics[4] < self.gauge_observation < metrics[5]:
-                return 'medium high'
-            if metrics[5] < self.gauge_observation < metrics[6]:
-                return 'high'
-
-        if len(metrics) == 7 and len(low_metrics) < len(high_metrics):
-            if metrics[0] < self.gauge_observation < metrics[1]:
-                return 'low'
-            if metrics[1] < self.gauge_observation < metrics[2]:
-                return 'medium low'
-            if metrics[2] < self.gauge_observation < metrics[3]:
-                return 'medium'
-            if metrics[3] < self.gauge_observation < metrics[4]:
-                return 'medium high'
-            if metrics[4] < self.gauge_observation < metrics[5]:
-                return 'high'
-            if metrics[5] < self.gauge_observation < metrics[6]:
-                return 'very high'
-
-        if len(metrics) == 8:
-            if metrics[0] < self.gauge_observation < metrics[1]:
-                return 'very low'
-            if metrics[1] < self.gauge_observation < metrics[2]:
-                return 'low'
-            if metrics[2] < self.gauge_observation < metrics[3]:
-                return 'medium low'
-            if metrics[3] < self.gauge_observation < metrics[4]:
-                return 'medium'
-            if metrics[4] < self.gauge_observation < metrics[5]:
-                return 'medium high'
-            if metrics[5] < self.gauge_observation < metrics[6]:
-                return 'high'
-            if metrics[6] < self.gauge_observation < metrics[7]:
-                return 'very high'
-
-        if len(metrics) == 9 and len(low_metrics) > len(high_metrics):
-            if metrics[0] < self.gauge_observation < metrics[1]:
-                return 'extremely low'
-            if metrics[1] < self.gauge_observation < metrics[2]:
-                return 'very low'
-            if metrics[2] < self.gauge_observation < metrics[3]:
-                return 'low'
-            if metrics[3] < self.gauge_observation < metrics[4]:
-                return 'medium low'
-            if metrics[4] < self.gauge_observation < metrics[5]:
-                return 'medium'
-            if metrics[5] < self.gauge_observation < metrics[6]:
-                return 'medium high'
-            if metrics[6] < self.gauge_observation < metrics[7]:
-                return 'high'
-            if metrics[7] < self.gauge_observation < metrics[8]:
-                return 'very high'
-
-        if len(metrics) == 9 and len(low_metrics) > len(high_metrics):
-            if metrics[0] < self.gauge_observation < metrics[1]:
-                return 'very low'
-            if metrics[1] < self.gauge_observation < metrics[2]:
-                return 'low'
-            if metrics[2] < self.gauge_observation < metrics[3]:
-                return 'medium low'
-            if metrics[3] < self.gauge_observation < metrics[4]:
-                return 'medium'
-            if metrics[4] < self.gauge_observation < metrics[5]:
-                return 'medium high'
-            if metrics[5] < self.gauge_observation < metrics[6]:
-                return 'high'
-            if metrics[6] < self.gauge_observation < metrics[7]:
-                return 'very high'
-            if metrics[7] < self.gauge_observation < metrics[8]:
-                return 'extremely high'
-
-        if len(metrics) == 10:
-            if metrics[0] < self.gauge_observation < metrics[1]:
-                return 'extremely low'
-            if metrics[1] < self.gauge_observation < metrics[2]:
-                return 'very low'
-            if metrics[2] < self.gauge_observation < metrics[3]:
-                return 'low'
-            if metrics[3] < self.gauge_observation < metrics[4]:
-                return 'medium low'
-            if metrics[4] < self.gauge_observation < metrics[5]:
-                return 'medium'
-            if metrics[5] < self.gauge_observation < metrics[6]:
-                return 'medium high'
-            if metrics[6] < self.gauge_observation < metrics[7]:
-                return 'high'
-            if metrics[7] < self.gauge_observation < metrics[8]:
-                return 'very high'
-            if metrics[8] < self.gauge_observation < metrics[9]:
-                return 'extremely high'
-
-    def _download_raw_json_from_aw(self):
-        url = 'https://www.americanwhitewater.org/content/River/detail/id/{}/.json'.format(self.reach_id)
+        # when there are an odd number of ranges, the extra stage is at the low or high end depending on which has more
+        if len(low_metrics) > len(high_metrics):
+            labels = _GAUGE_STAGE_LABELS.get((len(metrics), 'low'))
+        elif len(low_metrics) < len(high_metrics):
+            labels = _GAUGE_STAGE_LABELS.get((len(metrics), 'high'))
+        else:
+            labels = None
+        if labels is None:
+            labels = _GAUGE_STAGE_LABELS.get(len(metrics))
+        if labels is None:
+            return None
 
-        attempts = 0
-        status_code = 0
+        # the observation is in the stage between the ranges on either side, but not a stage if right on a range
+        idx = bisect.bisect_left(metrics, self.gauge_observation)
+        if metrics[idx] == self.gauge_observation:
+            return None
+        return labels[idx - 1]
 
-        while attempts < 10 and status_code != 200:
-            resp = requests.get(url)
-            if resp.status_code == 200 and len(resp.content):
-                return resp.json()
-            elif resp.status_code == 200 and not len(resp.content):
-                return False
-            elif resp.status_code == 500:
-                return False
-            else:
-                attempts = attempts + 1
-        raise Exception('cannot download data for reach_id {}'.format(self['reach_id']))
+    def _download_raw_json_from_aw(self, refresh=False):
+        url = 'https://www.americanwhitewater.org/content/River/detail/id/{}/.json'.format(self.reach_id)
+
+        # use a recent copy of the reach if there is one on disk, unless asked for the current reach
+        disk_cache = _get_disk_cache() if CACHE_ENABLED else None
+        cache_key = ('aw', self.reach_id)
+        if disk_cache is not None and not refresh:
+            content = disk_cache.get(cache_key)
+            if content is not None:
+                return _aw_json_loads(content)
+
+        resp = _SESSION.get(url, timeout=_TIMEOUT)
+
+        if resp.status_code == 200 and len(resp.content):
+            if disk_cache is not None:
+                disk_cache.set(cache_key, resp.content, expire=_AW_CACHE_EXPIRE)
+            return _aw_json_loads(resp.content)
+        elif resp.status_code == 200 and not len(resp.content):
+            return False
+        elif resp.status_code == 500:
+            return False
+        else:
+            raise Exception('cannot download data for reach_id {}'.format(self.reach_id))
 
     def _parse_difficulty_string(self, difficulty_combined):
-        match = re.match(
-            '^([I|IV|V|VI|5\.\d]{1,3}(?=-))?-?([I|IV|V|VI|5\.\d]{1,3}[+|-]?)\(?([I|IV|V|VI|5\.\d]{0,3}[+|-]?)',
-            difficulty_combined
-        )
+        match = _DIFF_RE.match(difficulty_combined)
         self.difficulty_minimum = self._get_if_length(match.group(1))
         self.difficulty_maximum = self._get_if_length(match.group(2))
         self.difficulty_outlier = self._get_if_length(match.group(3))
@@ -847,21 +1431,13 @@ class Reach(object):
             # clean up the text garbage...because there is a lot of it
             value = self._cleanup_string(json_block[key])
 
-            # now, ensure something is still there...not kidding, this frequently is the case...it is all gone
-            if not value:
-                return None
-            elif not len(value):
-                return None
+            # now, ensure something is still there...not kidding, this frequently is the case...it is all gone, and
+            # there is actually some text in the block, not just blank characters or a placeholder
+            if value and value.strip() and value != 'N/A':
+                return value
 
             else:
-                # now check to ensure there is actually some text in the block, not just blank characters
-                if not (re.match(r'^([ \r\n\t])+$', value) or not (value != 'N/A')):
-
-                    # if everything is good, return a value
-                    return value
-
-                else:
-                    return None
+                return None
 
     @staticmethod
     def _cleanup_string(input_string):
@@ -870,22 +1446,20 @@ class Reach(object):
         if not input_string:
             return input_string
 
-        # convert to markdown first, so any reasonable formatting is retained
-        cleanup = html2text(input_string)
-
-        # since people love to hit the space key multiple times in stupid places, get rid of multiple space, but leave
-        # newlines in there since they actually do contribute to formatting
-        cleanup = re.sub(r'\s{2,}', ' ', cleanup)
-
-        # apparently some people think it is a good idea to hit return more than twice...account for this foolishness
-        cleanup = re.sub(r'\n{3,}', '\n\n', cleanup)
-        cleanup = re.sub('(.)\n(.)', '\g<1> \g<2>', cleanup)
+        # convert to markdown first, so any reasonable formatting is retained, unless this is a short bit of plain text
+        # like a river or section name, which html2text would return unchanged
+        if len(input_string) <= _HTML2TEXT_LINE_WIDTH and not _NEEDS_HTML2TEXT_RE.search(input_string):
+            cleanup = input_string
+        else:
+            cleanup = _html2text_cached(input_string)
 
-        # get rid of any trailing newlines at end of entire text block
-        cleanup = re.sub(r'\n+$', '', cleanup)
+        # since people love to hit the space and return keys multiple times in stupid places, turn every line return
+        # into a space with a plain string replace, and then collapse any run of whitespace to a single space - any
+        # trailing newlines end up as trailing whitespace removed by the strip below
+        cleanup = _WHITESPACE_RUN_RE.sub(' ', cleanup.replace('\n', ' '))
 
         # correct any leftover standalone links
-        cleanup = cleanup.replace('<', '[').replace('>', ']')
+        cleanup = cleanup.translate(_ANGLE_TABLE)
 
         # get rid of any leading or trailing spaces
         cleanup = cleanup.strip()
@@ -912,8 +1486,10 @@ class Reach(object):
         self.reach_alternate_name = remove_backslashes(self._validate_aw_json(reach_info, 'altname'))
 
         self.huc = self._validate_aw_json(reach_info, 'huc')
-        self.description = self._validate_aw_json(reach_info, 'description')
-        self.abstract = self._validate_aw_json(reach_info, 'abstract')
+
+        # converting the description and abstract out of html is the slowest part of parsing, so wait until needed
+        self._raw_reach_info = reach_info
+
         self.agency = self._validate_aw_json(reach_info, 'agency')
         length = self._validate_aw_json(reach_info, 'length')
         if length:
@@ -932,11 +1508,18 @@ class Reach(object):
             self.gauge_units = gauge_info['metric_unit']
             self.gauge_metric = gauge_info['gauge_metric']
 
+            # collect the range values first, so a range listed more than once is only set on the reach once, with
+            # the last value listed winning the same as before
+            gauge_ranges = {}
             for rng in self._reach_json['guagesummary']['ranges']:
-                if rng['range_min'] and rng['gauge_min']:
-                    setattr(self, f"gauge_{rng['range_min'].lower()}", float(rng['gauge_min']))
-                if rng['range_max'] and rng['gauge_max']:
-                    setattr(self, f"gauge_{rng['range_max'].lower()}", float(rng['gauge_max']))
+                range_min, range_max = rng['range_min'], rng['range_max']
+                if range_min and rng['gauge_min']:
+                    gauge_ranges['gauge_' + range_min.lower()] = float(rng['gauge_min'])
+                if range_max and rng['gauge_max']:
+                    gauge_ranges['gauge_' + range_max.lower()] = float(rng['gauge_max'])
+
+            for name, value in gauge_ranges.items():
+                setattr(self, name, value)
 
         # save the update datetime as a true datetime object
         if reach_info['edited']:
@@ -949,14 +1532,10 @@ class Reach(object):
 
         # ensure putin coordinates are present, and if so, add the put-in point to the points list
         if reach_info['plon'] is not None and reach_info['plat'] is not None:
-            self._reach_points.append(
+            self._add_reach_point(
                 ReachPoint(
                     reach_id=self.reach_id,
-                    geometry=Point({
-                        'x': float(reach_info['plon']),
-                        'y': float(reach_info['plat']),
-                        'spatialReference': {'wkid': 4326}
-                    }),
+                    geometry=_wgs84_point(reach_info['plon'], reach_info['plat']),
                     point_type='access',
                     subtype='putin'
                 )
@@ -964,36 +1543,91 @@ class Reach(object):
 
         # ensure take-out coordinates are present, and if so, add take-out point to points list
         if reach_info['tlon'] is not None and reach_info['tlat'] is not None:
-            self._reach_points.append(
+            self._add_reach_point(
                 ReachPoint(
                     reach_id=self.reach_id,
                     point_type='access',
                     subtype='takeout',
-                    geometry=Point({
-                        'x': float(reach_info['tlon']),
-                        'y': float(reach_info['tlat']),
-                        'spatialReference': {'wkid': 4326}
-                    })
+                    geometry=_wgs84_point(reach_info['tlon'], reach_info['tlat'])
                 )
             )
 
+    def _parse_aw_text(self):
+        """helper to convert the description and abstract from AW out of html the first time either one is used"""
+        reach_info = self._raw_reach_info
+        if reach_info is None:
+            return
+        self._raw_reach_info = None
+
+        self._description = self._validate_aw_json(reach_info, 'description')
+        self._abstract = self._validate_aw_json(reach_info, 'abstract')
+
         # if there is not an abstract, create one from the description
-        if (not self.abstract or len(self.abstract) == 0) and (self.description and len(self.description) > 0):
+        if (not self._abstract or len(self._abstract) == 0) and (self._description and len(self._description) > 0):
+
+            # reomve all line returns, html tags, trim to 500 characters, and trim to last space to ensure full word -
+            # with the tags already stripped, there is nothing left for html2text to do, so only collapse whitespace
+            abstract = _strip_tags(reach_info['description']).replace('\n', ' ')
+            abstract = _WHITESPACE_RUN_RE.sub(' ', abstract).strip()
+            abstract = abstract.replace('\\', '').replace('/n', '')[:500]
+            abstract = abstract[:abstract.rfind(' ')]
+            self._abstract = abstract + '...'
 
-            # reomve all line returns, html tags, trim to 500 characters, and trim to last space to ensure full word
-            self.abstract = self._cleanup_string(_strip_tags(reach_info['description']))
-            self.abstract = self.abstract.replace('\\', '').replace('/n', '')[:500]
-            self.abstract = self.abstract[:self.abstract.rfind(' ')]
-            self.abstract = self.abstract + '...'
+    @property
+    def description(self):
+        self._parse_aw_text()
+        return self._description
+
+    @description.setter
+    def description(self, value):
+        self._parse_aw_text()
+        self._description = value
+
+    @property
+    def abstract(self):
+        self._parse_aw_text()
+        return self._abstract
+
+    @abstract.setter
+    def abstract(self, value):
+        self._parse_aw_text()
+        self._abstract = value
+
+    def _copy_for_cache(self):
+        """helper creating a copy to keep in the reach cache, without the raw AW JSON, which is only used in parsing"""
+        # the raw JSON is only read, so share it instead of copying it, just long enough to convert the text
+        memo = {id(self._reach_json): None, id(self._raw_reach_info): self._raw_reach_info}
+        reach = deepcopy(self, memo)
+        reach._parse_aw_text()
+        return reach
 
     @classmethod
-    def get_from_aw(cls, reach_id):
+    def get_from_aw(cls, reach_id, refresh=False):
+        """
+        Get a reach from American Whitewater.
+        :param reach_id: American Whitewater reach id.
+        :param refresh: Boolean - Optional
+            Download the reach again even if recently retrieved, such as when updating from a change on AW.
+        :return: Reach object, or False if the reach does not exist.
+        """
+        # if this reach was recently parsed, return a copy so the caller can modify it without changing the cache
+        cache_key = (cls, str(reach_id))
+        if CACHE_ENABLED and not refresh:
+            with _REACH_CACHE_LOCK:
+                cached = _REACH_CACHE.get(cache_key)
+                if cached is not None and cached[0] < time.monotonic():
+                    del _REACH_CACHE[cache_key]
+                    cached = None
+                elif cached is not None:
+                    _REACH_CACHE.move_to_end(cache_key)
+            if cached is not None:
+                return deepcopy(cached[1])
 
         # create instance of reach
         reach = cls(reach_id)
 
         # download raw JSON from American Whitewater
-        raw_json = reach._download_raw_json_from_aw()
+        raw_json = reach._download_raw_json_from_aw(refresh)
 
         # if a reach does not exist at url, simply a blank response, return false
         if not raw_json:
@@ -1002,9 +1636,39 @@ class Reach(object):
         # parse data out of the AW JSON
         reach._parse_json(raw_json)
 
+        # keep a private copy of the parsed reach, dropping the least recently used once the cache is full
+        if CACHE_ENABLED:
+            cached = (time.monotonic() + _REACH_CACHE_TTL, reach._copy_for_cache())
+            with _REACH_CACHE_LOCK:
+                _REACH_CACHE[cache_key] = cached
+                _REACH_CACHE.move_to_end(cache_key)
+                while len(_REACH_CACHE) > _REACH_CACHE_SIZE:
+                    _REACH_CACHE.popitem(last=False)
+
         # return the result
         return reach
 
+    @classmethod
+    def get_from_aw_many(cls, reach_ids, max_download_workers=16):
+        """
+        Get many reaches from American Whitewater. Downloading is waiting on the network, so it is done on a thread
+        pool. The descriptions are only converted out of HTML when first used, so parsing is quick, and is done here.
+        :param reach_ids: Iterable of American Whitewater reach ids.
+        :param max_download_workers: Integer - Optional
+            Maximum number of reaches to download at the same time.
+        :return: List of Reach objects, or False where the reach does not exist, in the same order as the input.
+        """
+        reaches = [cls(reach_id) for reach_id in reach_ids]
+
+        with ThreadPoolExecutor(max_workers=max_download_workers) as executor:
+            raw_json_list = list(executor.map(lambda reach: reach._download_raw_json_from_aw(), reaches))
+
+        for reach, raw_json in zip(reaches, raw_json_list):
+            if raw_json:
+                reach._parse_json(raw_json)
+
+        return [reach if raw_json else False for reach, raw_json in zip(reaches, raw_json_list)]
+
     @classmethod
     def get_from_arcgis(cls, reach_id, reach_point_layer, reach_centroid_layer, reach_line_layer):
 
@@ -1014,10 +1678,13 @@ class Reach(object):
         # get a data frame for the centroid, since this is used to store the most reach information
         df_centroid = reach_centroid_layer.query_by_reach_id(reach_id).sdf
 
-        # populate all relevant properties of the reach using the downloaded reach centroid
+        # populate all relevant properties of the reach using the downloaded reach centroid, skipping columns for
+        # derived values like the extent, which are read only
+        settable_fields = _get_settable_fields(cls)
+        centroid_row = df_centroid.iloc[0]
         for column in df_centroid.columns:
-            if hasattr(reach, column):
-                setattr(reach, column, df_centroid.iloc[0][column])
+            if column in settable_fields:
+                setattr(reach, column, centroid_row[column])
 
         # if reach points provided...is optional
         if reach_point_layer:
@@ -1025,37 +1692,25 @@ class Reach(object):
             # get the reach points as a spatially enabled dataframe
             df_points = reach_point_layer.query_by_reach_id(reach_id).sdf
 
-            # iterate rows to create reach points in the parent reach object
-            for _, row in df_points.iterrows():
+            # iterate rows as plain dictionaries to create reach points in the parent reach object, with SHAPE renamed
+            # to geometry up front instead of swapping it out for each row
+            for row_dict in df_points.rename(columns={'SHAPE': 'geometry'}).to_dict('records'):
 
-                # get a dictionary of values, and swap out geometry for SHAPE
-                row_dict = row.to_dict()
-                row_dict['geometry'] = row_dict['SHAPE']
-
-                # get a list of ReachPoint input args
-                reach_point_args = inspect.getfullargspec(ReachPoint).args
-
-                # create a list of input arguments from the columns in the row
-                input_args = []
-                for arg in reach_point_args[1:]:
-                    if arg in row_dict.keys():
-                        input_args.append(row_dict[arg])
-                    else:
-                        input_args.append(None)
+                # create a list of input arguments from the columns in the row, using the ReachPoint input args
+                # looked up once when the module is loaded
+                input_args = [row_dict.get(arg) for arg in _REACH_POINT_ARGS]
 
                 # use the input args to create a new reach point
                 reach_point = ReachPoint(*input_args)
 
                 # add the reach point to the reach points list
-                reach._reach_points.append(reach_point)
+                reach._add_reach_point(reach_point)
 
         # try to get the line geometry, and use this for the reach geometry
         fs_line = reach_line_layer.query_by_reach_id(reach_id)
-        if len(fs_line.features) > 0:
-            for this_feature in fs_line.features:
-                if this_feature.geometry is not None:
-                    reach._geometry = Geometry(this_feature.geometry)
-                    break
+        line_feature = next((feature for feature in fs_line.features if feature.geometry is not None), None)
+        if line_feature is not None:
+            reach.set_geometry(Geometry(line_feature.geometry))
 
         # return the reach object
         return reach
@@ -1064,10 +1719,18 @@ class Reach(object):
 
         # check to ensure the correct access type is being specified
         if access_type != 'putin' and access_type != 'takeout' and access_type != 'intermediate':
-            raise Exception('access type must be either "putin", "takeout" or "intermediate"')
+            raise ValueError('access type must be either "putin", "takeout" or "intermediate"')
 
-        # return list of all accesses of specified type
-        return [pt for pt in self._reach_points if pt.subtype == access_type and pt.point_type == 'access']
+        # return tuple of all accesses of specified type, the stored tuple itself, since it cannot be modified
+        return self._memoized('accesses_by_type', self._index_accesses_by_type).get(access_type, ())
+
+    def _index_accesses_by_type(self):
+        """helper function grouping the accesses by subtype, so access lookups do not scan all the reach points"""
+        access_index = {}
+        for pt in self._reach_points:
+            if pt.point_type == 'access':
+                access_index.setdefault(pt.subtype, []).append(pt)
+        return {subtype: tuple(accesses) for subtype, accesses in access_index.items()}
 
     def _set_putin_takeout(self, access, access_type):
         """
@@ -1079,12 +1742,12 @@ class Reach(object):
         :return:
         """
         # enforce correct object type
-        if type(access) != ReachPoint:
-            raise Exception('{} access must be an instance of ReachPoint object type'.format(access_type))
+        if not isinstance(access, ReachPoint):
+            raise TypeError('{} access must be an instance of ReachPoint object type'.format(access_type))
 
         # check to ensure the correct access type is being specified
         if access_type != 'putin' and access_type != 'takeout':
-            raise Exception('access type must be either "putin" or "takeout"')
+            raise ValueError('access type must be either "putin" or "takeout"')
 
         # update the list to NOT include the point we are adding
         self._reach_points = [pt for pt in self._reach_points if pt.subtype != access_type]
@@ -1094,7 +1757,7 @@ class Reach(object):
         access.subtype = access_type
 
         # add it to the reach point list
-        self._reach_points.append(access)
+        self._add_reach_point(access)
 
     @property
     def putin(self):
@@ -1122,13 +1785,25 @@ class Reach(object):
     def intermediate_accesses(self):
         access_df = self._get_accesses_by_type('intermediate')
         if len(access_df) > 0:
-            return access_df
+            return list(access_df)
         else:
             return None
 
     def add_intermediate_access(self, access):
-        access.set_type('intermediate')
-        self.access_list.append(access)
+        access.point_type = 'access'
+        access.subtype = 'intermediate'
+        self._add_reach_point(access)
+
+    def snap_all_accesses(self, max_workers=8):
+        """
+        Snap all the accesses for the reach to the NHD Plus hydrolines at the same time, sharing the pooled
+        connection to the EPA WATERS services.
+        :param max_workers: Integer - Optional
+            Maximum number of accesses to snap at the same time.
+        :return: List of Boolean snap status for each access, in the same order as the reach points.
+        """
+        accesses = [pt for pt in self._reach_points if pt.point_type == 'access']
+        return ReachPoint.snap_many(accesses, max_workers)
 
     def snap_putin_and_takeout_and_trace(self, webmap=False, gis=None):
         """
@@ -1164,21 +1839,21 @@ class Reach(object):
 
             if nhd_status:
 
-                # try to trace a few times using WATERS, but if it doesn't work, bingo to Esri Hydrology
-                attempts = 0
+                # try to trace a few times using WATERS, backing off between attempts, but if it doesn't work,
+                # bingo to Esri Hydrology
                 max_attempts = 5
 
-                while attempts < max_attempts:
+                for attempt in range(max_attempts):
 
                     try:
 
                         # use the EPA navigate service to trace downstream
-                        waters = WATERS()
+                        waters = _waters()
                         trace_polyline = waters.get_downstream_navigation_polyline(self.putin.nhdplus_reach_id,
                                                                                    self.putin.nhdplus_measure)
 
                         # project the takeout geometry to the same spatial reference as the trace polyline
-                        takeout_geom = self.takeout.geometry.match_spatial_reference(self.takeout.geometry)
+                        takeout_geom = self.takeout.geometry.match_spatial_reference(trace_polyline)
 
                         # snap the takeout geometry to the hydroline
                         takeout_geom = takeout_geom.snap_to_line(trace_polyline)
@@ -1189,21 +1864,34 @@ class Reach(object):
                         # now dial in the coordinates using the EPA service - getting the rest of the attributes
                         self.takeout.snap_to_nhdplus()
 
-                        # ensure a takeout was actually found
+                        # ensure a takeout was actually found - trying again will not change this, so stop here
                         if self.takeout.nhdplus_measure is None or self.takeout.nhdplus_reach_id is None:
                             self.error = True
                             self.notes = 'Takeout could not be located using EPS\'s WATERS service'
                             trace_status = False
 
+                        # trace the hydroline between the putin and takeout
                         else:
+                            self.set_geometry(waters.get_updown_ptp_polyline(
+                                self.putin.nhdplus_reach_id, self.putin.nhdplus_measure,
+                                self.takeout.nhdplus_reach_id, self.takeout.nhdplus_measure
+                            ))
                             trace_status = True
                             self.tracing_method = 'EPA WATERS NHD Plus v2'
-                            break
 
-                    except:
+                        break
 
-                        # increment the attempt counter
-                        attempts += 1
+                    # HTTP failures are already retried by the session, so only retry what another attempt can
+                    # change, a dropped connection or a garbled response
+                    except (requests.RequestException,) + _JSON_DECODE_ERRORS:
+                        if attempt < max_attempts - 1:
+                            time.sleep(0.5 * 2 ** attempt)
+
+                    # anything else, such as no hydrolines found or the takeout not snapping to the trace, fails the
+                    # same way on every attempt, so go straight to the Esri Hydrology fallback
+                    except Exception as e:
+                        print(f'Tracing reach id {self.reach_id} using WATERS failed, so using Esri Hydrology: {e}')
+                        break
 
             # if the put-in has not yet been located using the WATERS service
             if not trace_status:
@@ -1273,12 +1961,12 @@ class Reach(object):
                     if line_geom.coordinates().size > 6:
 
                         # smooth the geometry since the hydrology tracing can appear a little jagged
-                        self._geometry = _smooth_geometry(line_geom,
-                                                          densify_max_segment_length=trace_data_resolution * 2,
-                                                          gis=gis)
+                        self.set_geometry(_smooth_geometry(line_geom,
+                                                           densify_max_segment_length=trace_data_resolution * 2,
+                                                           gis=gis))
 
                     else:
-                        self._geometry = line_geom
+                        self.set_geometry(line_geom)
 
                     trace_status = True
                     self.tracing_method = "ArcGIS Online Hydrology Services"
@@ -1295,6 +1983,31 @@ class Reach(object):
         else:
             return trace_status
 
+    @staticmethod
+    def snap_putin_and_takeout_and_trace_many(reaches, gis=None, max_workers=16):
+        """
+        Update the putin and takeout coordinates, and trace the hydroline for many reaches concurrently. Since the
+        work is almost entirely waiting on the WATERS services, the reaches are processed on a thread pool sharing
+        the pooled HTTP session.
+        :param reaches: Iterable of Reach objects to be traced.
+        :param gis: Active GIS for performing hydrology analysis.
+        :param max_workers: Integer - Optional
+            Maximum number of reaches to trace at the same time.
+        :return: List of Boolean trace status for each reach in the same order as the input, with False for any reach
+            raising an exception, the reason being saved in the reach error and notes.
+        """
+        def trace(reach):
+            try:
+                return reach.snap_putin_and_takeout_and_trace(gis=gis)
+            except Exception as e:
+                print(f'Tracing failed for reach id {reach.reach_id}: {e}')
+                reach.error = True
+                reach.notes = f'The reach could not be traced: {e}'
+                return False
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(trace, reaches))
+
     @property
     def geometry(self):
         """
@@ -1303,20 +2016,23 @@ class Reach(object):
         """
         return self._geometry
 
+    def set_geometry(self, geometry):
+        """
+        Set the reach polyline geometry.
+        :param geometry: Polyline Geometry
+        :return: Boolean True if successful
+        """
+        self._geometry = geometry
+        return True
+
     def _get_feature_attributes(self):
         """helper function for exporting features"""
-        srs = pd.Series(dir(self))
-        srs = srs[
-            (~srs.str.startswith('_'))
-            & (~srs.str.contains('as_'))
-            & (srs != 'putin')
-            & (srs != 'takeout')
-            & (srs != 'intermediate_accesses')
-            & (srs != 'geometry')
-            & (srs != 'has_a_point')
-            ]
-        srs = srs[srs.apply(lambda p: not hasattr(getattr(self, p), '__call__'))]
-        return {key: getattr(self, key) for key in srs}
+        return {key: getattr(self, key) for key in self._FEATURE_FIELDS}
+
+    def _get_memoized_feature_attributes(self):
+        """helper function for exporting features, reusing the attributes until the reach changes"""
+        # copy, since callers modify the attributes of the features before pushing them
+        return dict(self._memoized('feature_attributes', self._get_feature_attributes))
 
     @property
     def as_feature(self):
@@ -1325,9 +2041,14 @@ class Reach(object):
         :return: ArcGIS Python API Feature object representing the reach.
         """
         if self.geometry:
-            feat = Feature(geometry=self.geometry, attributes=self._get_feature_attributes())
+
+            # include the bounding box, so comparisons against it do not need the full geometry
+            attributes = self._get_memoized_feature_attributes()
+            attributes.update(zip(('xmin', 'ymin', 'xmax', 'ymax'), self.bbox))
+            feat = Feature(geometry=self.geometry, attributes=attributes)
+
         else:
-            feat = Feature(attributes=self._get_feature_attributes())
+            feat = Feature(attributes=self._get_memoized_feature_attributes())
         return feat
 
     @property
@@ -1336,7 +2057,7 @@ class Reach(object):
         Get a feature with the centroid geometry.
         :return: Feature with point geometry for the reach centroid.
         """
-        return Feature(geometry=self.centroid, attributes=self._get_feature_attributes())
+        return Feature(geometry=self.centroid, attributes=self._get_memoized_feature_attributes())
 
     def publish(self, reach_line_layer, reach_centroid_layer, reach_point_layer):
         """
@@ -1371,6 +2092,58 @@ class Reach(object):
         else:
             return False
 
+    @staticmethod
+    def publish_many(reaches, reach_line_layer, reach_centroid_layer, reach_point_layer):
+        """
+        Publish many reaches to the three feature layers; the reach line layer, the reach centroid layer, and the
+        reach points layer, using a single add request per layer for all the reaches.
+        :param reaches: Iterable of Reach objects to publish.
+        :param reach_line_layer: ReachLayer with line geometry to publish to.
+        :param reach_centroid_layer: ReachLayer with point geometry for the centroid to publish to.
+        :param reach_point_layer: ReachPointLayer
+        :return: List of Boolean True if successful and False if not for each reach in the same order as the input.
+        """
+        reaches = list(reaches)
+
+        # same as publishing a single reach, only reaches with a put-in or take-out are published
+        publishable = [reach for reach in reaches if reach.putin or reach.takeout]
+        if not len(publishable):
+            return [False for _ in reaches]
+
+        def get_add_status(resp, owners):
+            # add results come back in the same order as the adds, so map each back to the reach it came from
+            status = {}
+            for owner, result in zip(owners, resp['addResults']):
+                status[id(owner)] = status.get(id(owner), True) and result.get('success', False)
+            return status
+
+        # convert any descriptions still waiting to be parsed out of html now, so the layers are not racing to do it
+        # when building features from the same reaches on different threads
+        for reach in publishable:
+            reach._parse_aw_text()
+
+        # the three layers are independent endpoints, so send the adds to all of them at the same time
+        traced = [reach for reach in publishable if not reach.error]
+        with ThreadPoolExecutor(max_workers=3) as executor:
+
+            # add the reach lines for reaches successfully traced
+            line_future = executor.submit(reach_line_layer.add_reach, traced) if len(traced) else None
+
+            # regardless, add the centroids and points
+            centroid_future = executor.submit(reach_centroid_layer.add_reach, publishable)
+            point_future = executor.submit(reach_point_layer.add_reach, publishable)
+
+        # surface any error from adding the lines, same as when the adds were made one after the other
+        if line_future is not None:
+            line_future.result()
+
+        centroid_status = get_add_status(centroid_future.result(), publishable)
+
+        point_owners = [reach for reach in publishable for _ in reach._reach_points]
+        point_status = get_add_status(point_future.result(), point_owners)
+
+        return [centroid_status.get(id(reach), False) and point_status.get(id(reach), False) for reach in reaches]
+
     def publish_updates(self, reach_line_layer, reach_centroid_layer, reach_point_layer):
         """
         Based on the current status of the reach, push updates to the online Feature Services.
@@ -1388,16 +2161,15 @@ class Reach(object):
         resp_centroid = reach_centroid_layer.update_reach(self)
         update_centroid = len(resp_centroid['updateResults'])
 
-        resp_putin = reach_point_layer.update_putin(self.putin)
-        update_putin = len(resp_putin['updateResults'])
-
-        resp_takeout = reach_point_layer.update_takeout(self.takeout)
-        update_takeout = len(resp_takeout['updateResults'])
+        # update the put-in and take-out together, with one query and one edit request, and both need to have been
+        # updates of existing accesses, same as when updated one at a time
+        resp_access = reach_point_layer.update_accesses([self.putin, self.takeout])
+        update_access = len(resp_access['updateResults']) == 2
 
         # check results for adds and return correct response
-        if update_line and update_centroid and update_putin and update_takeout:
+        if update_line and update_centroid and update_access:
             return True
-        elif update_centroid and update_putin and update_takeout:
+        elif update_centroid and update_access:
             return True
         else:
             return False
@@ -1440,61 +2212,38 @@ class Reach(object):
         elif gis is None:
             gis = GIS()
 
+        # get the extent and centroid once, rather than looking them up for every use
+        xmin, ymin, xmax, ymax = self.extent
+        centroid = self.centroid
+
         webmap = gis.map()
         webmap.basemap = 'topo-vector'
         webmap.extent = {
-            'xmin': self.extent[0],
-            'ymin': self.extent[1],
-            'xmax': self.extent[2],
-            'ymax': self.extent[3],
+            'xmin': xmin,
+            'ymin': ymin,
+            'xmax': xmax,
+            'ymax': ymax,
             'spatialReference': {'wkid': 4326}
         }
         if self.geometry:
             webmap.draw(
                 shape=self.geometry,
-                symbol={
-                    "type": "esriSLS",
-                    "style": "esriSLSSolid",
-                    "color": [0, 0, 255, 255],
-                    "width": 1.5
-                }
+                symbol=_LINE_SYMBOL
             )
         if self.putin.geometry:
             webmap.draw(
                 shape=self.putin.geometry,
-                symbol={
-                    "xoffset": 12,
-                    "yoffset": 12,
-                    "type": "esriPMS",
-                    "url": "http://static.arcgis.com/images/Symbols/Basic/GreenFlag.png",
-                    "contentType": "image/png",
-                    "width": 24,
-                    "height": 24
-                }
+                symbol=_PUTIN_SYMBOL
             )
         if self.takeout.geometry:
             webmap.draw(
                 shape=self.takeout.geometry,
-                symbol={
-                    "xoffset": 12,
-                    "yoffset": 12,
-                    "type": "esriPMS",
-                    "url": "http://static.arcgis.com/images/Symbols/Basic/RedFlag.png",
-                    "contentType": "image/png",
-                    "width": 24,
-                    "height": 24
-                }
+                symbol=_TAKEOUT_SYMBOL
             )
-        if self.as_centroid_feature.geometry:
+        if centroid:
             webmap.draw(
-                shape=self.as_centroid_feature.geometry,
-                symbol={
-                    "type": "esriPMS",
-                    "url": "http://static.arcgis.com/images/Symbols/Basic/CircleX.png",
-                    "contentType": "image/png",
-                    "width": 24,
-                    "height": 24
-                }
+                shape=centroid,
+                symbol=_CENTROID_SYMBOL
             )
 
         mpbx_otdrs = 'mapbox_outdoors'
@@ -1509,14 +2258,46 @@ class Reach(object):
         return webmap
 
 
+# placeholder for attributes not set on an object, since None is a valid value
+_MISSING = object()
+
+# valid values for the side of the river an access is on, including not known
+_SIDES_OF_RIVER = frozenset(('left', 'right', None))
+
+
 class ReachPoint(object):
     """
     Discrete object facilitating working with reach points.
     """
 
+    # public attributes sent to the feature service, in output column order
+    _FEATURE_FIELDS = (
+        'reach_id', 'point_type', 'subtype', 'name', 'nhdplus_measure', 'nhdplus_reach_id', 'collection_method',
+        'update_date', 'notes', 'description', 'difficulty', 'side_of_river', 'uid'
+    )
+
+    __slots__ = _FEATURE_FIELDS + ('_geometry', '_reach')
+
+    def __setattr__(self, key, value):
+        # any change to the point invalidates values the parent reach has memoized from it
+        object.__setattr__(self, key, value)
+        if key != '_reach':
+            self._notify_reach()
+
+    def __delattr__(self, key):
+        object.__delattr__(self, key)
+        self._notify_reach()
+
+    def _notify_reach(self):
+        """helper bumping the version of the reach the point belongs to, if any, when the point changes"""
+        reach = getattr(self, '_reach', None)
+        if reach is not None:
+            reach._version = getattr(reach, '_version', 0) + 1
+
     def __init__(self, reach_id, geometry, point_type, uid=None, subtype=None, name=None, side_of_river=None,
                  collection_method=None, update_date=None, notes=None, description=None, difficulty=None, **kwargs):
 
+        self._reach = None  # set when added to a reach
         self.reach_id = str(reach_id)
         self.point_type = point_type
         self.subtype = subtype
@@ -1543,8 +2324,10 @@ class ReachPoint(object):
 
     @property
     def type_id(self):
-        id_list = ['null' if val is None else val for val in [self.reach_id, self.point_type, self.subtype]]
-        return '_'.join(id_list)
+        reach_id, point_type, subtype = self.reach_id, self.point_type, self.subtype
+        return '{}_{}_{}'.format('null' if reach_id is None else reach_id,
+                                 'null' if point_type is None else point_type,
+                                 'null' if subtype is None else subtype)
 
     @property
     def geometry(self):
@@ -1561,8 +2344,8 @@ class ReachPoint(object):
         :param geometry: Point Geometry Object
         :return: Boolean True if successful
         """
-        if geometry.type != 'Point':
-            raise Exception('access geometry must be a valid ArcGIS Point Geometry object')
+        if getattr(geometry, 'type', None) != 'Point':
+            raise TypeError('access geometry must be a valid ArcGIS Point Geometry object')
         else:
             self._geometry = geometry
             return True
@@ -1573,8 +2356,8 @@ class ReachPoint(object):
         :param side_of_river:
         :return:
         """
-        if side_of_river is not None and side_of_river != 'left' and side_of_river != 'right':
-            raise Exception('side of river must be either "left" or "right"')
+        if side_of_river not in _SIDES_OF_RIVER:
+            raise ValueError('side of river must be either "left" or "right"')
         else:
             self.side_of_river = side_of_river
 
@@ -1585,13 +2368,13 @@ class ReachPoint(object):
         :return: Boolean True when complete
         """
         if self.geometry:
-            waters = WATERS()
-            epa_point = waters.get_epa_snap_point(self.geometry.x, self.geometry.y)
+            # snaps are cached on the location, but always requested using the coordinates as provided
+            epa_point = _waters().get_epa_snap_point(self.geometry.x, self.geometry.y)
 
             # if the EPA WATERSs' service was able to locate a point
             if epa_point:
 
-                # set properties accordingly
+                # set properties accordingly, the geometry being created new for each call
                 self.set_geometry(epa_point['geometry'])
                 self.nhdplus_measure = epa_point['measure']
                 self.nhdplus_reach_id = epa_point['id']
@@ -1601,17 +2384,43 @@ class ReachPoint(object):
             else:
                 return False
 
+    def _get_attributes(self, include_nulls=True):
+        """helper function getting the attribute values, skipping any removed from the point, in one lookup each"""
+        attributes = {}
+        for key in self._FEATURE_FIELDS:
+            value = getattr(self, key, _MISSING)
+            if value is not _MISSING and (include_nulls or value is not None):
+                attributes[key] = value
+        return attributes
+
+    def get_feature(self, include_nulls=True):
+        """
+        Get the access as an ArcGIS Python API Feature object.
+        :param include_nulls: Boolean - Optional
+            Include attributes without a value. Leaving them out makes requests adding many points smaller, but
+            they need to be included when updating a feature to clear out a value.
+        :return: ArcGIS Python API Feature object representing the access.
+        """
+        return Feature(geometry=self._geometry, attributes=self._get_attributes(include_nulls))
+
     @property
     def as_feature(self):
         """
         Get the access as an ArcGIS Python API Feature object.
         :return: ArcGIS Python API Feature object representing the access.
         """
-        return Feature(
-            geometry=self._geometry,
-            attributes={key: vars(self)[key] for key in vars(self).keys()
-                        if key != '_geometry' and not key.startswith('_')}
-        )
+        return self.get_feature()
+
+    def get_dictionary(self, include_nulls=True):
+        """
+        Get the point as a dictionary of values making it easier to build DataFrames.
+        :param include_nulls: Boolean - Optional
+            Include attributes without a value.
+        :return: Dictionary of all properties, with a little modification for geometries.
+        """
+        dict_point = self._get_attributes(include_nulls)
+        dict_point['SHAPE'] = self._geometry
+        return dict_point
 
     @property
     def as_dictionary(self):
@@ -1619,56 +2428,266 @@ class ReachPoint(object):
         Get the point as a dictionary of values making it easier to build DataFrames.
         :return: Dictionary of all properties, with a little modification for geometries.
         """
-        dict_point = {key: vars(self)[key] for key in vars(self).keys() if not key.startswith('_')}
-        dict_point['SHAPE'] = self.geometry
-        return dict_point
+        return self.get_dictionary()
+
+    @classmethod
+    def to_records(cls, points):
+        """
+        Get many points as a list of dictionaries, so a DataFrame can be created from all of them at once.
+        :param points: Iterable of ReachPoint objects.
+        :return: List of dictionaries of all properties, with a little modification for geometries.
+        """
+        return [point.as_dictionary for point in points]
+
+    @classmethod
+    def snap_many(cls, points, max_workers=16):
+        """
+        Snap many points to the NHD Plus hydrolines at the same time, since snapping is almost entirely waiting on
+        the EPA WATERS service. The requests share the pooled connection, and duplicate locations are only requested
+        once.
+        :param points: Iterable of ReachPoint objects.
+        :param max_workers: Integer - Optional
+            Maximum number of points to snap at the same time.
+        :return: List of Boolean snap status for each point in the same order as the input.
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(lambda point: point.snap_to_nhdplus(), points))
+
+
+def _get_reach_list(reach):
+    """
+    Get a list of reaches from either a single reach or an iterable of reaches, checking the object types.
+    :param reach: Reach or iterable of Reach objects.
+    :return: List of Reach objects.
+    """
+    reaches = [reach] if isinstance(reach, Reach) else list(reach) if hasattr(reach, '__iter__') else [reach]
+    for this_reach in reaches:
+        if not isinstance(this_reach, Reach):
+            raise TypeError('Reach to add must be a Reach object instance.')
+    return reaches
+
+
+def _quote(value):
+    """
+    Escape a value for use inside a quoted string in a where clause.
+    :param value: Value to escape.
+    :return: String with any single quotes doubled, so the value cannot end the string.
+    """
+    return str(value).replace("'", "''")
+
+
+# the ArcGIS Python API (checked against arcgis 1.8.0, as pinned in requirements.txt) does not raise a specific type
+# for an error returned by the service, but a plain Exception with the message ending in "(Error Code: <code>)"
+_SERVICE_ERROR_CODE_RE = re.compile(r'\(Error Code: (\d+)\)\s*$')
+
+
+def _is_rejected_request(error):
+    """
+    Check if an exception raised by the ArcGIS Python API is the service rejecting the request as invalid (HTTP 400),
+        rather than an authentication, permission or connection error.
+    :param error: Exception raised by the ArcGIS Python API.
+    :return: Boolean True if the service rejected the request.
+    """
+    match = _SERVICE_ERROR_CODE_RE.search(str(error))
+    return match is not None and match.group(1) == '400'
+
+
+@functools.lru_cache(maxsize=1024)
+def _where_reach(reach_id):
+    """
+    Get the where clause selecting features for a reach. Cached, since the same reaches are frequently queried
+    repeatedly.
+    :param reach_id: Reach id.
+    :return: String where clause.
+    """
+    return f"reach_id = '{_quote(reach_id)}'"
+
+
+# input arguments for creating a ReachPoint, so rows from the reach point layer can be matched to them
+_REACH_POINT_ARGS = ReachPoint.__init__.__code__.co_varnames[1:ReachPoint.__init__.__code__.co_argcount]
+
+# fields from the reach point layer set on a ReachPoint after it is created
+_REACH_POINT_ATTRS = frozenset(ReachPoint._FEATURE_FIELDS).difference(_REACH_POINT_ARGS)
+
+
+# layer urls for items, keyed by GIS url and item id, since looking up an item takes a couple of requests
+_ITEM_LAYER_URLS = {}
+
+
+def _get_item_layer_url(gis, item_id):
+    """
+    Get the url of the first layer in an item, only looking up the item the first time.
+    :param gis: ArcGIS Python API GIS object instance.
+    :param item_id: String item id.
+    :return: String url of the first layer in the item.
+    """
+    key = (getattr(gis, 'url', None), item_id)
+    url = _ITEM_LAYER_URLS.get(key)
+    if url is None:
+        url = Item(gis, item_id).layers[0].url
+        _ITEM_LAYER_URLS[key] = url
+    return url
 
 
 class _ReachIdFeatureLayer(FeatureLayer):
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        # share one connection pool across all the layers using the same GIS, so create the reach, centroid and
+        # point layers with the same GIS instance
+        _pool_gis_session(getattr(self, '_gis', None))
+
+        # recent reach id query results, since the same reach is frequently looked up repeatedly
+        self._reach_id_cache = OrderedDict()
+        self._reach_id_cache_lock = threading.Lock()
+
     @classmethod
     def from_item_id(cls, gis, item_id):
-        url = Item(gis, item_id).layers[0].url
-        return cls(url, gis)
+        return cls(_get_item_layer_url(gis, item_id), gis)
 
     @classmethod
     def from_url(cls, gis, url):
         return cls(url, gis)
 
     def query_by_reach_id(self, reach_id, spatial_reference={'wkid': 4326}):
-        return self.query(f"reach_id = '{reach_id}'", out_sr=spatial_reference)
+        if not CACHE_ENABLED:
+            return self.query(_where_reach(reach_id), out_sr=spatial_reference)
+
+        key = (str(reach_id), json.dumps(spatial_reference, sort_keys=True))
+
+        # use a recent result if there is one, returning a copy so the caller can modify it without changing the cache
+        with self._reach_id_cache_lock:
+            cached = self._reach_id_cache.get(key)
+            if cached is not None and time.monotonic() - cached[0] < _QUERY_CACHE_TTL:
+                self._reach_id_cache.move_to_end(key)
+            else:
+                cached = None
+        if cached is not None:
+            return deepcopy(cached[1])
+
+        feature_set = self.query(_where_reach(reach_id), out_sr=spatial_reference)
+
+        # keep a private copy, since the caller may modify the feature set returned
+        cached_feature_set = deepcopy(feature_set)
+        with self._reach_id_cache_lock:
+            self._reach_id_cache[key] = (time.monotonic(), cached_feature_set)
+            self._reach_id_cache.move_to_end(key)
+            while len(self._reach_id_cache) > _QUERY_CACHE_SIZE:
+                self._reach_id_cache.popitem(last=False)
+
+        return feature_set
+
+    def _add_features(self, features, chunk_size=250, max_workers=4):
+        """
+        Add features to the layer, creating them from the iterable as they are sent, in requests of no more than
+        chunk_size features to keep each request well under the service size limit, sending up to max_workers
+        requests at the same time.
+        :param features: Iterable of Feature objects.
+        :param chunk_size: Integer - Optional
+            Maximum number of features sent in each request.
+        :param max_workers: Integer - Optional
+            Maximum number of requests sent at the same time.
+        :return: Dictionary response from edit features method, with the results of all the requests combined.
+        """
+        features = iter(features)
+
+        # features are created here as each chunk is taken, while the chunks already taken are being sent
+        futures = []
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while True:
+                chunk = list(itertools.islice(features, chunk_size))
+
+                # with no features at all, still make one request, so there is a response to return
+                if len(chunk) or not len(futures):
+                    futures.append(executor.submit(self.edit_features, adds=chunk))
+                if not len(chunk):
+                    break
+
+        # combine the add results in the same order the features were provided
+        resp = futures[0].result()
+        for future in futures[1:]:
+            resp['addResults'].extend(future.result()['addResults'])
+        return resp
+
+    def invalidate(self, reach_id=None):
+        """
+        Discard recent query results for a reach, so the next query gets the data from the service.
+        :param reach_id: Reach id to discard results for - if not provided, all results are discarded.
+        :return:
+        """
+        with self._reach_id_cache_lock:
+            if reach_id is None:
+                self._reach_id_cache.clear()
+            else:
+                for key in [key for key in self._reach_id_cache if key[0] == str(reach_id)]:
+                    del self._reach_id_cache[key]
 
     def flush(self):
         """
         Delete all data!
         :return: Response
         """
-        # get a list of all OID's
+        self.invalidate()
+
+        # let the server find and delete everything in one pass if it will, only falling back to deleting by OID when
+        # the service rejects the request, so authentication, permission and connection errors are still raised
+        try:
+            resp = self.delete_features(where='1=1')
+        except Exception as e:
+            if not _is_rejected_request(e):
+                raise
+            print(f'Deleting all features at once was rejected, so deleting by OID instead: {e}')
+        else:
+            results = resp.get('deleteResults', [])
+            if 'error' not in resp and resp.get('success', True) and all(result.get('success') for result in results):
+                return resp
+            print(f'Deleting all features at once did not succeed, so deleting by OID instead: {resp}')
+
+        # otherwise, get a list of all OID's
         oid_list = self.query(return_ids_only=True)['objectIds']
 
         # if there are features
         if len(oid_list):
-            # convert the list to a comma separated string
-            oid_deletes = ','.join([str(v) for v in oid_list])
 
-            # delete all the features using the OID string
-            return self.edit_features(deletes=oid_deletes)
+            # delete in chunks, since one huge comma separated string of OID's is frequently rejected
+            chunk_size = 500
+            oid_chunks = [','.join(map(str, oid_list[idx:idx + chunk_size]))
+                          for idx in range(0, len(oid_list), chunk_size)]
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                resp_list = list(executor.map(lambda oid_deletes: self.edit_features(deletes=oid_deletes), oid_chunks))
+
+            # combine the responses into a single response similar to deleting everything at once
+            return {'deleteResults': [result for resp in resp_list for result in resp['deleteResults']]}
 
 
 class ReachPointFeatureLayer(_ReachIdFeatureLayer):
 
-    def add_reach(self, reach):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        # names of the date fields, looked up in the layer properties the first time they are needed
+        self._date_fields = None
+
+    def add_reach(self, reach, include_nulls=True):
         """
         Push new reach points to the reach point feature service in bulk.
-        :param reach: Reach - Required
-            Reach object being pushed to feature service.
+        :param reach: Reach or iterable of Reach objects - Required
+            Reach object, or many Reach objects, being pushed to feature service in a single request.
+        :param include_nulls: Boolean - Optional
+            Send attributes without a value. Leaving them out makes the requests smaller, but any field with a
+            default value in the service then gets the default instead of null.
         :return: Dictionary response from edit features method.
         """
-        # check for correct object type
-        if type(reach) != Reach:
-            raise Exception('Reach to add must be a Reach object instance.')
-
-        return self.edit_features(adds=reach.reach_points_as_features)
+        reaches = _get_reach_list(reach)
+        for this_reach in reaches:
+            self.invalidate(this_reach.reach_id)
+
+        if include_nulls:
+            return self._add_features(feature for reach in reaches for feature in reach.reach_points_as_features)
+        return self._add_features(
+            pt.get_feature(include_nulls=False) for reach in reaches for pt in reach._reach_points
+        )
 
     def _add_reach_point(self, reach_point):
         # add a new reach point to ArcGIS Online
@@ -1678,136 +2697,350 @@ class ReachPointFeatureLayer(_ReachIdFeatureLayer):
         return None
 
     def update_putin_or_takeout(self, access):
-        access_resp = self.query(
-            f"reach_id = '{access.reach_id}' AND point_type = 'access' AND subtype = '{access.subtype}'",
-            return_ids_only=True)['objectIds']
-        if len(access_resp):
-            oid_access = access_resp[0]
-            access_feature = access.as_feature
-            access_feature.attributes['OBJECTID'] = oid_access
-            return self.edit_features(updates=[access_feature])
-        else:
-            return self.edit_features(adds=[access.as_feature])
+        return self.update_accesses([access])
+
+    def update_accesses(self, accesses, chunk_size=500):
+        """
+        Push many accesses to the feature service, updating the access of the same subtype already in the service for
+        the reach, and adding the rest, using one query and one edit request for every chunk of accesses instead of
+        two for each access.
+        :param accesses: Iterable of ReachPoint accesses - Required
+            Accesses, typically put-ins and take-outs, being updated in the feature service.
+        :param chunk_size: Integer - Optional
+            Number of accesses in each query and edit request, keeping the where clause a reasonable length.
+        :return: Dictionary response from edit features method, with the results of all the requests combined.
+        """
+        accesses = list(accesses)
+        resp = {'addResults': [], 'updateResults': [], 'deleteResults': []}
+
+        for idx in range(0, len(accesses), chunk_size):
+            chunk = accesses[idx:idx + chunk_size]
+            for access in chunk:
+                self.invalidate(access.reach_id)
+
+            # get the oid of the existing access for each reach and subtype, keeping the first if there are more
+            id_list = ','.join(f"'{_quote(reach_id)}'" for reach_id in sorted({str(a.reach_id) for a in chunk}))
+            subtype_list = ','.join(f"'{_quote(subtype)}'" for subtype in sorted({str(a.subtype) for a in chunk}))
+            existing = self.query(
+                f"reach_id IN ({id_list}) AND point_type = 'access' AND subtype IN ({subtype_list})",
+                out_fields='reach_id,subtype,OBJECTID', return_geometry=False
+            )
+            oid_dict = {}
+            for feature in sorted(existing.features, key=lambda feature: feature.attributes['OBJECTID']):
+                key = (str(feature.attributes['reach_id']), feature.attributes['subtype'])
+                oid_dict.setdefault(key, feature.attributes['OBJECTID'])
+
+            # update the accesses already in the service, and add the rest
+            adds, updates = [], []
+            for access in chunk:
+                access_feature = access.as_feature
+                oid_access = oid_dict.get((str(access.reach_id), access.subtype))
+                if oid_access is not None:
+                    access_feature.attributes['OBJECTID'] = oid_access
+                    updates.append(access_feature)
+                else:
+                    adds.append(access_feature)
+
+            chunk_resp = self.edit_features(adds=adds, updates=updates)
+            for key in resp.keys():
+                resp[key].extend(chunk_resp.get(key, []))
+
+        return resp
 
     def update_putin(self, access):
         if not access.subtype == 'putin':
-            raise Exception('A put-in access point must be provided to update the put-in.')
+            raise ValueError('A put-in access point must be provided to update the put-in.')
         return self.update_putin_or_takeout(access)
 
     def update_takeout(self, access):
         if not access.subtype == 'takeout':
-            raise Exception('A take-out access point must be provided to update the take-out.')
+            raise ValueError('A take-out access point must be provided to update the take-out.')
         return self.update_putin_or_takeout(access)
 
-    def _create_reach_point_from_series(self, reach_point):
+    @staticmethod
+    def _create_reach_point_from_series(reach_point):
+
+        # get a dictionary of values, and swap out geometry for SHAPE
+        row_dict = dict(reach_point)
+        row_dict['geometry'] = row_dict.get('SHAPE')
 
-        # create an access object instance with the required parameters
-        access = ReachPoint(reach_point['reach_id'], reach_point['_geometry'], reach_point['type'])
+        # use the fields from the service matching the access object inputs to create it
+        access = ReachPoint(**{arg: row_dict.get(arg) for arg in _REACH_POINT_ARGS})
 
-        # for the remainder of the fields from the service, populate if matching key in access object
-        for key in [val for val in reach_point.keys() if val not in ['reach_id', '_geometry', 'type']]:
-            if key in access.keys():
-                access[key] = reach_point[key]
+        # populate the remaining fields from the service not set when creating the access
+        for key in _REACH_POINT_ATTRS.intersection(row_dict.keys()):
+            setattr(access, key, row_dict[key])
 
         return access
 
-    def get_putin(self, reach_id):
+    def _get_date_fields(self):
+        if self._date_fields is None:
+            self._date_fields = frozenset(
+                field['name'] for field in self.properties.fields if field['type'] == 'esriFieldTypeDate'
+            )
+        return self._date_fields
 
-        # get a pandas series from the feature service representing the putin access
-        sdf = self.get_putin_sdf(reach_id)
-        putin_series = sdf.iloc[0]
-        return self._create_reach_point_from_series(putin_series)
+    def _get_access(self, reach_id, access_type):
+
+        # only one access is needed, so get a single feature from the feature service, rather than building a
+        # spatially enabled dataframe for it
+        feature_set = self.query(
+            f"{_where_reach(reach_id)} AND point_type = 'access' AND subtype = '{_quote(access_type)}'",
+            result_record_count=1, return_all_records=False
+        )
+
+        if not len(feature_set.features):
+            return None
+        feature = feature_set.features[0]
+
+        # match the values from a spatially enabled dataframe, with dates as timestamps and the geometry as SHAPE
+        record = dict(feature.attributes)
+        for field in self._get_date_fields().intersection(record.keys()):
+            if record[field] is not None:
+                record[field] = pd.to_datetime(record[field], unit='ms')
+        record['SHAPE'] = Geometry(feature.geometry) if feature.geometry else None
+
+        return self._create_reach_point_from_series(record)
+
+    def get_putin(self, reach_id):
+        return self._get_access(reach_id, 'putin')
 
     def get_takeout(self, reach_id):
+        return self._get_access(reach_id, 'takeout')
+
+    def _query_accesses(self, reach_ids, where_clause, chunk_size):
+        """
+        Query for accesses for many reaches, using one query for every chunk of reach ids.
+        :param reach_ids: List of string reach ids.
+        :param where_clause: String where clause further limiting the accesses returned.
+        :param chunk_size: Integer number of reach ids included in each query.
+        :return: Generator of ReachPoint accesses.
+        """
+        for idx in range(0, len(reach_ids), chunk_size):
+            id_list = ','.join(f"'{_quote(reach_id)}'" for reach_id in reach_ids[idx:idx + chunk_size])
+            sdf = self.query(f"reach_id IN ({id_list}) AND {where_clause}").sdf
+
+            for record in sdf.to_dict('records'):
+                yield self._create_reach_point_from_series(record)
+
+    def get_accesses(self, reach_ids, chunk_size=500):
+        """
+        Get the accesses for many reaches, using one query for every chunk of reach ids instead of a query for
+        each access.
+        :param reach_ids: Iterable of reach ids.
+        :param chunk_size: Integer - Optional
+            Number of reach ids included in each query, keeping the where clause a reasonable length.
+        :return: Dictionary of lists of ReachPoint accesses keyed by reach id.
+        """
+        reach_ids = [str(reach_id) for reach_id in reach_ids]
+        accesses = {reach_id: [] for reach_id in reach_ids}
+
+        for access in self._query_accesses(reach_ids, "point_type = 'access'", chunk_size):
+            accesses.setdefault(access.reach_id, []).append(access)
 
-        # get a pandas series from the feature service representing the putin access
-        sdf = self.get_takeout_sdf(reach_id)
-        takeout_series = sdf.iloc[0]
-        return self._create_reach_point_from_series(takeout_series)
+        return accesses
+
+    def get_putins_and_takeouts(self, reach_ids, chunk_size=500):
+        """
+        Get the put-in and take-out for many reaches, using one query for every chunk of reach ids instead of two
+        queries for each reach.
+        :param reach_ids: Iterable of reach ids.
+        :param chunk_size: Integer - Optional
+            Number of reach ids included in each query, keeping the where clause a reasonable length.
+        :return: Dictionary of (put-in, take-out) ReachPoint tuples keyed by reach id, with None for any not found.
+        """
+        reach_ids = [str(reach_id) for reach_id in reach_ids]
+        putins, takeouts = {}, {}
+
+        where_clause = "point_type = 'access' AND subtype IN ('putin', 'takeout')"
+        for access in self._query_accesses(reach_ids, where_clause, chunk_size):
+
+            # same as getting a single access, keep the first one found
+            accesses = putins if access.subtype == 'putin' else takeouts
+            accesses.setdefault(access.reach_id, access)
+
+        return {reach_id: (putins.get(reach_id), takeouts.get(reach_id)) for reach_id in reach_ids}
+
+
+# property of a reach providing the feature for each geometry type of reach feature service
+_REACH_FEATURE_PROPERTIES = {
+    'esriGeometryPoint': 'as_centroid_feature',
+    'esriGeometryPolyline': 'as_feature'
+}
 
 
 class ReachFeatureLayer(_ReachIdFeatureLayer):
 
-    def query_by_river_name(self, river_name_search):
-        field_name = 'name_river'
-        where_list = ["{} LIKE '%{}%'".format(field_name, name_part) for name_part in river_name_search.split()]
-        where_clause = ' AND '.join(where_list)
-        return self.query(where_clause).df
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
 
-    def query_by_section_name(self, section_name_search):
-        field_name = 'name_section'
-        where_list = ["{} LIKE '%{}%'".format(field_name, name_part) for name_part in section_name_search.split()]
-        where_clause = ' AND '.join(where_list)
-        return self.query(where_clause).df
+        # the geometry type does not change, so only look it up in the layer properties the first time it is needed
+        self._reach_feature_property = None
 
-    def add_reach(self, reach):
+    def _query_df(self, where, out_fields='*', return_geometry=True, max_workers=4):
         """
-        Push reach to feature service.
-        :param reach: Reach - Required
-            Reach object being pushed to feature service.
-        :return: Dictionary response from edit features method.
+        Query for a DataFrame of features, and if there are more features than the service returns in one response,
+        requesting the rest of the pages at the same time instead of one after the other.
+        :param where: String where clause.
+        :param out_fields: String of comma separated field names to return.
+        :param return_geometry: Boolean, whether to return the feature geometries.
+        :param max_workers: Integer maximum number of pages requested at the same time.
+        :return: Pandas DataFrame of matching features.
         """
+        # if the service cannot page, simply make the query
+        page_size = getattr(self.properties, 'maxRecordCount', None)
+        capabilities = getattr(self.properties, 'advancedQueryCapabilities', None)
+        if not page_size or not getattr(capabilities, 'supportsPagination', False):
+            return self.query(where=where, out_fields=out_fields, return_geometry=return_geometry).df
 
-        # check for correct object type
-        if type(reach) != Reach:
-            raise Exception('Reach to add must be a Reach object instance.')
+        # page in a consistent order, so no feature is skipped or repeated between pages
+        oid_field = getattr(self.properties, 'objectIdField', 'OBJECTID')
 
-        # check the geometry type of the target feature service - point or line
-        if self.properties.geometryType == 'esriGeometryPoint':
-            point_feature = reach.as_centroid_feature
-            resp = self.edit_features(adds=[point_feature])
+        def get_page(offset):
+            return self.query(where=where, out_fields=out_fields, return_geometry=return_geometry,
+                              result_offset=offset, result_record_count=page_size, order_by_fields=oid_field).df
 
-        elif self.properties.geometryType == 'esriGeometryPolyline':
-            line_feature = reach.as_feature
-            resp = self.edit_features(adds=[line_feature])
+        # most queries fit in the first page, so only count, and get the rest of the pages, if the first page is full
+        first_page = get_page(0)
+        if len(first_page.index) < page_size:
+            return first_page
 
-        else:
-            raise Exception('The feature service geometry type must be either point or polyline.')
+        count = self.query(where=where, return_count_only=True)
+        count = count['count'] if isinstance(count, dict) else count
 
-        return resp
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pages = list(executor.map(get_page, range(page_size, count, page_size)))
 
-    def update_reach(self, reach):
+        return pd.concat([first_page] + pages, ignore_index=True)
 
-        # get oid of records matching reach_id
-        oid_lst = self.query(f"reach_id = '{reach.reach_id}'", return_ids_only=True)['objectIds']
+    def _query_by_name(self, field_name, name_search, exact=False, out_fields='*', return_geometry=True):
+        """
+        Query for features with all the words in the search somewhere in the name field.
+        :param field_name: Name of the field to search.
+        :param name_search: String of words to search for.
+        :param exact: Boolean - Optional
+            Only find features where the name field is exactly the search, which the service can look up using an
+            index on the field instead of scanning every name.
+        :param out_fields: String - Optional
+            Comma separated field names to return, which must include the name field. Defaults to all fields.
+        :param return_geometry: Boolean - Optional
+            Whether to return the feature geometries. Defaults to True.
+        :return: Pandas DataFrame of matching features.
+        """
+        if exact:
+            return self._query_df("{} = '{}'".format(field_name, _quote(name_search.strip())), out_fields,
+                                  return_geometry)
 
-        # if a feature already exists - hopefully the case, get the oid, add it to the feature, and push it
-        if len(oid_lst) > 0:
+        name_parts = name_search.split()
+        if not len(name_parts):
+            return self._query_df('1=1', out_fields, return_geometry)
 
-            # check the geometry type of the target feature service - point or line
-            if self.properties.geometryType == 'esriGeometryPoint':
-                update_feat = reach.as_centroid_feature
+        # only have the service scan for the longest, likely most selective, word - escaping single quotes so they
+        # do not end the string in the where clause
+        name_parts.sort(key=len, reverse=True)
+        df = self._query_df("{} LIKE '%{}%'".format(field_name, _quote(name_parts[0])), out_fields, return_geometry)
 
-            elif self.properties.geometryType == 'esriGeometryPolyline':
-                update_feat = reach.as_feature
+        # check for the rest of the words locally
+        for name_part in name_parts[1:]:
+            if len(df.index):
+                df = df[df[field_name].str.contains(name_part, case=False, regex=False, na=False)]
 
-            update_feat.attributes['OBJECTID'] = oid_lst[0]
-            resp = self.edit_features(updates=[update_feat])
+        return df
 
-        # if the feature does not exist, add it
-        else:
-            resp = self.add_reach(reach)
+    def query_by_river_name(self, river_name_search, exact=False, out_fields='*', return_geometry=True):
+        return self._query_by_name('name_river', river_name_search, exact, out_fields, return_geometry)
+
+    def query_by_section_name(self, section_name_search, exact=False, out_fields='*', return_geometry=True):
+        return self._query_by_name('name_section', section_name_search, exact, out_fields, return_geometry)
+
+    def add_reach(self, reach):
+        """
+        Push reach to feature service.
+        :param reach: Reach or iterable of Reach objects - Required
+            Reach object, or many Reach objects, being pushed to feature service in a single request.
+        :return: Dictionary response from edit features method.
+        """
+        reaches = _get_reach_list(reach)
+        for this_reach in reaches:
+            self.invalidate(this_reach.reach_id)
+
+        return self._add_features(self._get_reach_feature(reach) for reach in reaches)
+
+    def _get_reach_feature(self, reach):
+        """
+        Get the feature for a reach matching the geometry type of the feature service.
+        :param reach: Reach object.
+        :return: Feature with the centroid geometry for a point layer, or the reach line for a polyline layer.
+        """
+        # check the geometry type of the target feature service - point or line
+        if self._reach_feature_property is None:
+            self._reach_feature_property = _REACH_FEATURE_PROPERTIES.get(self.properties.geometryType)
+            if self._reach_feature_property is None:
+                raise RuntimeError('The feature service geometry type must be either point or polyline.')
+
+        return getattr(reach, self._reach_feature_property)
+
+    def update_reach(self, reach):
+        return self.update_reaches([reach])
+
+    def update_reaches(self, reaches, chunk_size=500):
+        """
+        Push many reaches to the feature service, updating the features for reaches already in the service and adding
+        the rest, using one query and one edit request for every chunk of reaches instead of two for each reach.
+        :param reaches: Reach or iterable of Reach objects - Required
+            Reach objects being updated in the feature service.
+        :param chunk_size: Integer - Optional
+            Number of reaches in each query and edit request, keeping the where clause a reasonable length.
+        :return: Dictionary response from edit features method, with the results of all the requests combined.
+        """
+        reaches = _get_reach_list(reaches)
+        resp = {'addResults': [], 'updateResults': [], 'deleteResults': []}
+
+        for idx in range(0, len(reaches), chunk_size):
+            chunk = reaches[idx:idx + chunk_size]
+            for reach in chunk:
+                self.invalidate(reach.reach_id)
+
+            # get the oid of the existing feature for each reach, keeping the first if there are more than one
+            id_list = ','.join(f"'{_quote(reach.reach_id)}'" for reach in chunk)
+            existing = self.query(f"reach_id IN ({id_list})", out_fields='reach_id,OBJECTID', return_geometry=False)
+            oid_dict = {}
+            for feature in sorted(existing.features, key=lambda feature: feature.attributes['OBJECTID']):
+                oid_dict.setdefault(str(feature.attributes['reach_id']), feature.attributes['OBJECTID'])
+
+            # if a feature already exists - hopefully the case, add the oid to the feature and update it, and if the
+            # feature does not exist, add it
+            adds, updates = [], []
+            for reach in chunk:
+                feature = self._get_reach_feature(reach)
+                if reach.reach_id in oid_dict:
+                    feature.attributes['OBJECTID'] = oid_dict[reach.reach_id]
+                    updates.append(feature)
+                else:
+                    adds.append(feature)
+
+            chunk_resp = self.edit_features(adds=adds, updates=updates)
+            for key in resp.keys():
+                resp[key].extend(chunk_resp.get(key, []))
 
         return resp
 
     def update_reach_attributes_only(self, reach):
+        self.invalidate(reach.reach_id)
 
         # get oid of records matching reach_id
-        oid_lst = self.query(f"reach_id = '{reach.reach_id}'", return_ids_only=True)['objectIds']
+        oid_lst = self.query(_where_reach(reach.reach_id), return_ids_only=True)['objectIds']
 
         # if a feature already exists - hopefully the case, get the oid, add it to the feature, and push it
         if len(oid_lst) > 0:
 
-            # check the geometry type of the target feature service - point or line
-            if self.properties.geometryType == 'esriGeometryPoint':
-                update_feat = reach.as_centroid_feature
-
-            elif self.properties.geometryType == 'esriGeometryPolyline':
-                update_feat = reach.as_feature
+            # get the feature for the geometry type of the target feature service - point or line
+            update_feat = self._get_reach_feature(reach)
 
             # remove any of the geographic properties from the feature
-            for attr in ['putin_x', 'putin_y', 'takeout_x', 'takeout_y', 'extent', 'centroid']:
-                del (update_feat.attributes[attr])
+            for attr in ['putin_x', 'putin_y', 'takeout_x', 'takeout_y', 'extent', 'centroid',
+                         'xmin', 'ymin', 'xmax', 'ymax']:
+                update_feat.attributes.pop(attr, None)
             update_feat = Feature(attributes=update_feat.attributes)  # gets rid of geometry
 
             update_feat.attributes['OBJECTID'] = oid_lst[0]
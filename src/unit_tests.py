@@ -1,4 +1,5 @@
 import unittest
+from copy import deepcopy
 from arcgis.geometry import Geometry
 import pandas as pd
 from arcgis.gis import GIS, Item
@@ -9,36 +10,58 @@ import src.hydrology as hydrology
 
 import config
 
-gis = GIS(username=config.arcgis_username, password=config.arcgis_password)
+# nearly all the time running these tests is spent waiting on web services, so they can be run concurrently, such as
+# with unittest-parallel: unittest-parallel -t . -s src -p unit_tests.py -j 20 --level=class
+# or with pytest-xdist, which keeps each class on one worker so setUpClass downloads run once per class, and reuses the
+# ArcGIS connection from get_gis for every class on the same worker: pytest -n auto --dist=loadscope src/unit_tests.py
+
+# tests calling AW, WATERS or ArcGIS are skipped unless RUN_NETWORK_TESTS=1, so a run while working on unrelated code
+# only takes a moment
+NETWORK = unittest.skipUnless(os.getenv('RUN_NETWORK_TESTS') == '1', 'set RUN_NETWORK_TESTS=1 to use web services')
 
 url_reach_line = config.url_reach_line
 url_reach_centroid = config.url_reach_centroid
 url_reach_points = config.url_reach_points
 
-lyr_line = ReachFeatureLayer(url_reach_line, gis)
-lyr_centroid = ReachFeatureLayer(url_reach_centroid, gis)
-lyr_points = ReachPointFeatureLayer(url_reach_points, gis)
+# Hayes Creek put-in on Canyon Creek, shared by the access tests
+PUTIN_GEOM = Geometry({'x': -121.633094, 'y': 45.79532367, 'spatialReference': {'wkid': 4326}})
 
-class ReachLDub(unittest.TestCase):
-    reach_id = 2156
-    putin_x = -121.634402
-    putin_y = 45.794848
-    takeout_x = -121.645582
-    takeout_y = 45.718817
-    name = 'Little White Salmon'
+_GIS = None
 
-    def test_class_init(self):
-        reach = Reach(self.reach_id)
-        self.assertEqual(str(self.reach_id), reach.reach_id)
 
-    def test_download_raw_json_from_aw(self):
-        reach = Reach(self.reach_id)
-        raw_json = reach._download_raw_json_from_aw()
-        self.assertTrue('CContainerViewJSON_view' in raw_json)
+def get_gis():
+    # connect the first time a test needs ArcGIS rather than when the module is imported, so each process running tests
+    # connects at most once, and only if it runs a test touching ArcGIS
+    global _GIS
+    if _GIS is None:
+        _GIS = GIS(username=config.arcgis_username, password=config.arcgis_password)
+    return _GIS
+
+
+def get_line_layer():
+    return ReachFeatureLayer(url_reach_line, get_gis())
+
+
+def get_centroid_layer():
+    return ReachFeatureLayer(url_reach_centroid, get_gis())
+
+
+def get_points_layer():
+    return ReachPointFeatureLayer(url_reach_points, get_gis())
+
+
+class ReachOffline(unittest.TestCase):
+    reach_ids = (2156, 3066)
+
+    def test_class_init(self):
+        for reach_id in self.reach_ids:
+            with self.subTest(reach_id=reach_id):
+                reach = Reach(reach_id)
+                self.assertEqual(str(reach_id), reach.reach_id)
 
     def test_parse_difficulty_string(self):
         difficulty = 'IV-V(V+)'
-        reach = Reach(self.reach_id)
+        reach = Reach(self.reach_ids[0])
         reach._parse_difficulty_string(difficulty)
         if reach.difficulty_minimum != 'IV':
             status = False
@@ -50,31 +73,78 @@ class ReachLDub(unittest.TestCase):
             status = True
         self.assertTrue(status)
 
+
+class GeometrySnapOffline(unittest.TestCase):
+    line = Geometry({
+        'paths': [
+            [[-121.64, 45.79], [-121.635, 45.795], [-121.63, 45.794], [-121.63, 45.794], [-121.62, 45.80]],
+            [[-121.61, 45.78], [-121.60, 45.785]]
+        ],
+        'spatialReference': {'wkid': 4326}
+    })
+    pts_xy = [[-121.636, 45.796], [-121.63, 45.79], [-121.625, 45.80], [-121.605, 45.781], [-121.65, 45.78]]
+
+    def test_snap_points_matches_snap_to_line(self):
+        snapped = self.line.snap_points(self.pts_xy)
+        for (x, y), (snap_x, snap_y, _) in zip(self.pts_xy, snapped):
+            with self.subTest(x=x, y=y):
+                pt = Geometry({'x': x, 'y': y, 'spatialReference': {'wkid': 4326}}).snap_to_line(self.line)
+                self.assertAlmostEqual(snap_x, pt.x, places=9)
+                self.assertAlmostEqual(snap_y, pt.y, places=9)
+
+    def test_snap_points_without_segments(self):
+        line = Geometry({'paths': [[[-121.64, 45.79]]], 'spatialReference': {'wkid': 4326}})
+        with self.assertRaisesRegex(Exception, 'at least one path with two or more vertices'):
+            line.snap_points(self.pts_xy)
+        with self.assertRaisesRegex(Exception, 'at least one path with two or more vertices'):
+            line.snap_points(self.pts_xy, approximate=True)
+
+
+@NETWORK
+class ReachLDub(unittest.TestCase):
+    reach_id = 2156
+    putin_x = -121.634402
+    putin_y = 45.794848
+    takeout_x = -121.645582
+    takeout_y = 45.718817
+    name = 'Little White Salmon'
+
+    @classmethod
+    def setUpClass(cls):
+        # download the reach once for all the tests, and copy it for any test modifying it
+        cls._reach = Reach.get_from_aw(cls.reach_id)
+
+    def test_download_raw_json_from_aw(self):
+        reach = Reach(self.reach_id)
+        raw_json = reach._download_raw_json_from_aw()
+        self.assertTrue('CContainerViewJSON_view' in raw_json)
+
     def test_get_from_aw(self):
-        reach = Reach.get_from_aw(self.reach_id)
+        reach = self._reach
         self.assertTrue(reach.river_name == 'Little White Salmon')
 
     def test_get_accesses_by_type(self):
-        reach = Reach.get_from_aw(self.reach_id)
+        reach = self._reach
         putin = reach._get_accesses_by_type('putin')[0]
         self.assertTupleEqual((self.putin_x, self.putin_y), (putin.geometry.x, putin.geometry.y))
 
     def test_putin(self):
-        reach = Reach.get_from_aw(self.reach_id)
+        reach = self._reach
         putin = reach.putin
         self.assertTupleEqual((self.putin_x, self.putin_y), (putin.geometry.x, putin.geometry.y))
 
     def test_takeout(self):
-        reach = Reach.get_from_aw(self.reach_id)
+        reach = self._reach
         takeout = reach.takeout
         self.assertTupleEqual((self.takeout_x, self.takeout_y), (takeout.geometry.x, takeout.geometry.y))
 
     def test_trace_result(self):
-        reach = Reach.get_from_aw(self.reach_id)
+        reach = deepcopy(self._reach)
         reach.snap_putin_and_takeout_and_trace()
         self.assertIsInstance(reach.geometry, Polyline)
 
 
+@NETWORK
 class ReachCanyon(unittest.TestCase):
     reach_id = 3066
     putin_x = -122.31600189209
@@ -82,67 +152,55 @@ class ReachCanyon(unittest.TestCase):
     takeout_x = -122.373001098633
     takeout_y = 45.9604988098145
 
-    def test_class_init(self):
-        ldub = Reach(self.reach_id)
-        self.assertEqual(str(self.reach_id), ldub.reach_id)
+    @classmethod
+    def setUpClass(cls):
+        # download the reach once for all the tests, and copy it for any test modifying it
+        cls._reach = Reach.get_from_aw(cls.reach_id)
 
     def test_download_raw_json_from_aw(self):
         ldub = Reach(self.reach_id)
         raw_json = ldub._download_raw_json_from_aw()
         self.assertTrue('CContainerViewJSON_view' in raw_json)
 
-    def test_parse_difficulty_string(self):
-        difficulty = 'IV-V(V+)'
-        ldub = Reach(self.reach_id)
-        ldub._parse_difficulty_string(difficulty)
-        if ldub.difficulty_minimum != 'IV':
-            status = False
-        elif ldub.difficulty_maximum != 'V':
-            status = False
-        elif ldub.difficulty_outlier != 'V+':
-            status = False
-        else:
-            status = True
-        self.assertTrue(status)
-
     def test_get_from_aw(self):
-        ldub = Reach.get_from_aw(self.reach_id)
+        ldub = self._reach
         self.assertTrue(ldub.river_name == 'Canyon Creek (Lewis River trib.)')
 
     def test_get_accesses_by_type(self):
-        ldub = Reach.get_from_aw(self.reach_id)
+        ldub = self._reach
         putin = ldub._get_accesses_by_type('putin')[0]
         self.assertTupleEqual((self.putin_x, self.putin_y), (putin.geometry.x, putin.geometry.y))
 
     def test_putin(self):
-        ldub = Reach.get_from_aw(self.reach_id)
+        ldub = self._reach
         putin = ldub.putin
         self.assertTupleEqual((self.putin_x, self.putin_y), (putin.geometry.x, putin.geometry.y))
 
     def test_takeout(self):
-        ldub = Reach.get_from_aw(self.reach_id)
+        ldub = self._reach
         takeout = ldub.takeout
         self.assertTupleEqual((self.takeout_x, self.takeout_y), (takeout.geometry.x, takeout.geometry.y))
 
     def test_trace_result(self):
-        reach = Reach.get_from_aw(self.reach_id)
+        reach = deepcopy(self._reach)
         reach.snap_putin_and_takeout_and_trace()
         self.assertIsInstance(reach.geometry, Polyline)
 
 
+@NETWORK
 class ReachAnon(unittest.TestCase):
     reach_id = 5523
 
     def test_publish(self):
         reach = Reach.get_from_aw(self.reach_id)
         reach.snap_putin_and_takeout_and_trace()
-        result = reach.publish(gis, lyr_reach_line, lyr_reach_centroid, lyr_reach_points)
+        result = reach.publish(get_line_layer(), get_centroid_layer(), get_points_layer())
         self.assertTrue(result)
 
 
 class AccessPutin(unittest.TestCase):
     canyon_reach_id = 3066
-    putin_point = Geometry({'x': -121.633094, 'y': 45.79532367, 'spatialReference': {'wkid': 4326}})
+    putin_point = PUTIN_GEOM
     point_type = 'access'
     subtype = 'putin'
     name = 'Hayes Creek'
@@ -151,7 +209,7 @@ class AccessPutin(unittest.TestCase):
     collection_date = '02 Nov 1998'
 
     test_series = pd.Series({
-        "_geometry": Geometry({'x': -121.633094, 'y': 45.79532367, 'spatialReference': {'wkid': 4326}}),
+        "_geometry": PUTIN_GEOM,
         "reach_id": str(canyon_reach_id),
         "point_type": point_type,
         "subtype": subtype,
@@ -190,8 +248,16 @@ class AccessPutin(unittest.TestCase):
 
     test_snap_geom_dict = {'x': -121.63309439504, 'y': 45.7953235252763, 'spatialReference': {'wkid': 4326}}
 
-    def test_instantiate_access(self):
-        access = ReachPoint(
+    def _assert_geom_close(self, geom_dict, expected_dict, places=6):
+        # compare coordinates to within about ten centimeters rather than bit for bit, so the snap is not tied to the
+        # exact floating point digits returned by the service
+        self.assertAlmostEqual(geom_dict['x'], expected_dict['x'], places=places)
+        self.assertAlmostEqual(geom_dict['y'], expected_dict['y'], places=places)
+        self.assertDictEqual(geom_dict['spatialReference'], expected_dict['spatialReference'])
+
+    def setUp(self):
+        # every test starts from the same put-in, built fresh so a test modifying it does not affect the others
+        self.access = ReachPoint(
             reach_id=self.canyon_reach_id,
             geometry=self.putin_point,
             point_type=self.point_type,
@@ -201,37 +267,24 @@ class AccessPutin(unittest.TestCase):
             collection_method=self.collection_method,
             update_date=self.collection_date
         )
+
+    def test_instantiate_access(self):
+        access = self.access
         self.assertEqual(type(access), ReachPoint)
 
     def test_as_feature(self):
-        access = ReachPoint(
-            reach_id=self.canyon_reach_id,
-            geometry=self.putin_point,
-            point_type=self.point_type,
-            subtype=self.subtype,
-            name=self.name,
-            side_of_river=self.side_of_river,
-            collection_method=self.collection_method,
-            update_date=self.collection_date
-        )
+        access = self.access
         delattr(access, 'uid')  # since this will be different every time, just remove it
         self.assertDictEqual(access.as_feature.as_dict, self.test_feature_dict)
 
+    @NETWORK
     def test_snap_geom_to_nhdplus(self):
-        access = ReachPoint(
-            reach_id=self.canyon_reach_id,
-            geometry=self.putin_point,
-            point_type=self.point_type,
-            subtype=self.subtype,
-            name=self.name,
-            side_of_river=self.side_of_river,
-            collection_method=self.collection_method,
-            update_date=self.collection_date
-        )
+        access = self.access
         access.snap_to_nhdplus()
-        self.assertDictEqual(access.as_feature.as_dict['geometry'], self.test_snap_geom_dict)
+        self._assert_geom_close(access.as_feature.as_dict['geometry'], self.test_snap_geom_dict)
 
 
+@NETWORK
 class ReachOutOfUSA(unittest.TestCase):
 
     """
@@ -247,6 +300,7 @@ class ReachOutOfUSA(unittest.TestCase):
         self.assertEqual(type(reach.centroid), Point)
 
 
+@NETWORK
 class HydrologyUnitTest(unittest.TestCase):
 
     reach_id = 1
@@ -266,13 +320,13 @@ class HydrologyUnitTest(unittest.TestCase):
         self.assertTrue(len(reach))
 
 
+@NETWORK
 class TestFault(unittest.TestCase):
 
     def test_run_reach(self):
-        gis = GIS(username=config.arcgis_username, password=config.arcgis_password)
         reach_id = 1
         reach = Reach.get_from_aw(reach_id)
-        reach.snap_putin_and_takeout_and_trace(gis=gis)
+        reach.snap_putin_and_takeout_and_trace(gis=get_gis())
         feature = reach.as_feature
         self.assertTrue(feature)
 
@@ -1,5 +1,6 @@
 import logging
 import json
+from concurrent.futures import ThreadPoolExecutor
 import azure.functions as func
 from arcgis.features import Feature
 
@@ -8,17 +9,22 @@ from src import config
 
 def main(msg: func.QueueMessage) -> None:
 
-   # we need a connection to arcgis, so start there
-    gis = GIS(username=config.arcgis_username, password=config.arcgis_password)
-    logging.info(f'Connected to GIS at {gis.url}.')
-
     # since the input message content is a single feature, extract the reach id from the feature
     feature_json = json.loads(msg.get_body())
     reach_id = feature_json['attributes']['reach_id']
     logging.info(f'Preparing to update reach id {reach_id}.')
 
-    # create a reach object to work with
-    reach = Reach.get_from_aw(reach_id)
+    # we need a connection to arcgis and a reach object to work with, and since neither depends on the other, connect
+    # and download the reach from AW at the same time
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        gis_future = executor.submit(GIS, username=config.arcgis_username, password=config.arcgis_password)
+        # refresh, since this runs in a long lived worker, and the message means the reach changed on AW
+        reach_future = executor.submit(Reach.get_from_aw, reach_id, refresh=True)
+
+    gis = gis_future.result()
+    logging.info(f'Connected to GIS at {gis.url}.')
+
+    reach = reach_future.result()
     logging.info(f'Retrieved reach id {reach_id} from AW.')
 
     # do the hard work, trace it